@@ -1,8 +1,16 @@
-from flask import Flask, request, jsonify, send_file
+from flask import Flask, request, jsonify, send_file, send_from_directory, Response
 from flask_cors import CORS
+import asyncio
+import hashlib
 import os
 import json
+import queue
 import tempfile
+import threading
+import time
+from concurrent.futures import Future
+from functools import lru_cache
+from werkzeug.exceptions import NotFound
 from werkzeug.utils import secure_filename
 import logging
 
@@ -16,21 +24,178 @@ from utils.lyrics_processor import LyricsProcessor
 app = Flask(__name__)
 CORS(app)
 
+# Resolved once at import time so downloads never touch os.getcwd()
+app.config['SONG_DIR'] = os.path.abspath('generated_songs')
+
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-# Initialize AI components
-mood_analyzer = MoodAnalyzer()
-music_generator = MusicGenerator()
-voice_cloner = VoiceCloner()
-audio_mixer = AudioMixer()
-lyrics_processor = LyricsProcessor()
+# Use orjson for request parsing and jsonify when available (C-speed
+# JSON handling for all endpoints, no handler changes needed)
+try:
+    import orjson
+    from flask.json.provider import JSONProvider
 
-@app.route('/', methods=['GET'])
-def home():
-    """Home page with instructions"""
-    return """
+    class ORJSONProvider(JSONProvider):
+        """Flask JSON provider backed by orjson"""
+
+        def dumps(self, obj, **kwargs):
+            return orjson.dumps(obj).decode()
+
+        def loads(self, s, **kwargs):
+            return orjson.loads(s)
+
+    app.json = ORJSONProvider(app)
+except ImportError:
+    logger.warning("orjson not available - using the default JSON provider")
+
+# Celery task queue (optional - falls back to synchronous processing).
+# Requires an explicit CELERY_BROKER_URL opt-in: the celery package is
+# always importable per requirements.txt, so a successful import says
+# nothing about whether a broker and worker are actually running.
+if os.getenv('CELERY_BROKER_URL'):
+    try:
+        from tasks import celery_app, build_song
+        from kombu.exceptions import OperationalError as BrokerOperationalError
+        CELERY_AVAILABLE = True
+    except ImportError:
+        celery_app = None
+        build_song = None
+        BrokerOperationalError = None
+        CELERY_AVAILABLE = False
+        logger.warning("Celery not available - /api/create-song will run synchronously")
+else:
+    celery_app = None
+    build_song = None
+    BrokerOperationalError = None
+    CELERY_AVAILABLE = False
+    logger.warning(
+        "CELERY_BROKER_URL not set - /api/create-song will run synchronously")
+
+# AI components are initialized lazily so lightweight endpoints like
+# /api/health never pay model-load cost, and gunicorn --preload can
+# share loaded weights across forked workers
+_mood_analyzer = None
+_music_generator = None
+_voice_cloner = None
+_audio_mixer = None
+_lyrics_processor = None
+
+def get_mood_analyzer():
+    global _mood_analyzer
+    if _mood_analyzer is None:
+        _mood_analyzer = MoodAnalyzer()
+    return _mood_analyzer
+
+def get_music_generator():
+    global _music_generator
+    if _music_generator is None:
+        _music_generator = MusicGenerator()
+    return _music_generator
+
+def get_voice_cloner():
+    global _voice_cloner
+    if _voice_cloner is None:
+        _voice_cloner = VoiceCloner()
+    return _voice_cloner
+
+def get_audio_mixer():
+    global _audio_mixer
+    if _audio_mixer is None:
+        _audio_mixer = AudioMixer()
+    return _audio_mixer
+
+def get_lyrics_processor():
+    global _lyrics_processor
+    if _lyrics_processor is None:
+        _lyrics_processor = LyricsProcessor()
+    return _lyrics_processor
+
+class _MoodBatcher:
+    """
+    Coalesce concurrent mood-analysis requests into batched model calls
+
+    Requests arriving within BATCH_WAIT_MS of each other are analyzed in
+    a single emotion-classifier forward pass (up to BATCH_MAX inputs),
+    amortizing the fixed per-call transformer overhead under load.
+    """
+
+    BATCH_MAX = 16
+    BATCH_WAIT_MS = 10
+
+    def __init__(self):
+        self._queue = queue.Queue()
+        self._worker = None
+        self._lock = threading.Lock()
+
+    def submit(self, lyrics):
+        """Queue lyrics for analysis and return a Future with the result"""
+        self._ensure_worker()
+        future = Future()
+        self._queue.put((lyrics, future))
+        return future
+
+    def _ensure_worker(self):
+        if self._worker is None:
+            with self._lock:
+                if self._worker is None:
+                    self._worker = threading.Thread(
+                        target=self._run, name='mood-batcher', daemon=True
+                    )
+                    self._worker.start()
+
+    def _run(self):
+        while True:
+            batch = [self._queue.get()]
+
+            # Collect whatever else arrives within the batching window
+            deadline = time.monotonic() + self.BATCH_WAIT_MS / 1000
+            while len(batch) < self.BATCH_MAX:
+                timeout = deadline - time.monotonic()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=timeout))
+                except queue.Empty:
+                    break
+
+            try:
+                results = get_mood_analyzer().analyze_batch(
+                    [lyrics for lyrics, _ in batch]
+                )
+                for (_, future), result in zip(batch, results):
+                    future.set_result(result)
+            except Exception as e:
+                logger.error(f"Mood batch failed: {e}")
+                for _, future in batch:
+                    future.set_exception(e)
+
+_mood_batcher = _MoodBatcher()
+
+# Bound in-process song builds so a request storm can't pile up an
+# unbounded number of concurrent synthesis pipelines; requests beyond
+# the limit fail fast with 503 instead of queueing
+_synth_semaphore = threading.BoundedSemaphore(
+    int(os.getenv('SYNTH_CONCURRENCY', '2'))
+)
+
+@lru_cache(maxsize=4096)
+def _analyze_mood_cached(normalized_lyrics):
+    """Run the mood analyzer on normalized lyrics (memoized, batched)"""
+    return _mood_batcher.submit(normalized_lyrics).result()
+
+def analyze_mood_cached(lyrics):
+    """
+    Analyze mood with an LRU cache keyed on normalized lyrics.
+
+    Repeated or trivially reformatted lyrics skip the heavy analysis
+    entirely; the analyzer lowercases and strips punctuation internally,
+    so normalizing the cache key does not change results.
+    """
+    return _analyze_mood_cached(' '.join(lyrics.lower().split()))
+
+_HOME_HTML = ("""
     <html>
     <head>
         <title>Nusify AI Music Generator</title>
@@ -86,7 +251,18 @@ def home():
         </div>
     </body>
     </html>
-    """
+    """).encode('utf-8')
+_HOME_ETAG = hashlib.md5(_HOME_HTML).hexdigest()
+
+@app.route('/', methods=['GET'])
+def home():
+    """Home page with instructions"""
+    # Served from a precomputed bytes constant; no per-request string
+    # building or re-encoding
+    response = Response(_HOME_HTML, mimetype='text/html')
+    response.headers['Cache-Control'] = 'public, max-age=3600'
+    response.set_etag(_HOME_ETAG)
+    return response.make_conditional(request)
 
 @app.route('/api/health', methods=['GET'])
 def health_check():
@@ -101,14 +277,14 @@ def health_check():
 def analyze_mood():
     """Analyze the mood of lyrics"""
     try:
-        data = request.get_json()
-        lyrics = data.get('lyrics', '')
-        
-        if not lyrics:
-            return jsonify({'error': 'Lyrics are required'}), 400
-        
-        # Analyze mood using AI
-        mood_result = mood_analyzer.analyze(lyrics)
+        data = request.get_json(force=True, silent=True) or {}
+        lyrics = get_lyrics_processor().normalize(data.get('lyrics', ''))
+
+        if not get_lyrics_processor().is_valid(lyrics):
+            return jsonify({'error': 'Valid lyrics are required'}), 400
+
+        # Analyze mood using AI (cached on normalized lyrics)
+        mood_result = analyze_mood_cached(lyrics)
         
         return jsonify({
             'mood': mood_result['mood'],
@@ -131,7 +307,7 @@ def generate_music():
         duration = data.get('duration', 30)  # seconds
         
         # Generate music using AI
-        music_path = music_generator.generate(mood, genre, duration)
+        music_path = get_music_generator().generate(mood, genre, duration)
         
         return jsonify({
             'music_path': music_path,
@@ -148,96 +324,222 @@ def generate_music():
 def clone_voice():
     """Clone voice for lyrics"""
     try:
-        data = request.get_json()
-        lyrics = data.get('lyrics', '')
+        data = request.get_json(force=True, silent=True) or {}
+        lyrics = get_lyrics_processor().normalize(data.get('lyrics', ''))
         artist_voice = data.get('artist_voice', 'default')
-        
-        if not lyrics:
-            return jsonify({'error': 'Lyrics are required'}), 400
-        
+
+        if not get_lyrics_processor().is_valid(lyrics):
+            return jsonify({'error': 'Valid lyrics are required'}), 400
+
         # Clone voice using AI
-        voice_path = voice_cloner.clone_voice(lyrics, artist_voice)
+        voice_path = get_voice_cloner().clone_voice(lyrics, artist_voice)
         
         return jsonify({
             'voice_path': voice_path,
             'artist_voice': artist_voice,
-            'duration': len(lyrics.split()) * 0.5  # Rough estimate
+            'duration': get_lyrics_processor().count_words(lyrics) * 0.5  # Rough estimate
         })
     
     except Exception as e:
         logger.error(f"Error cloning voice: {str(e)}")
         return jsonify({'error': 'Failed to clone voice'}), 500
 
+async def run_song_pipeline_async(lyrics, artist_voice, genre):
+    """
+    Run the complete song creation pipeline.
+
+    Music generation and voice cloning are independent stages, so they
+    run concurrently on worker threads via asyncio.gather.
+
+    Args:
+        lyrics (str): The lyrics to turn into a song
+        artist_voice (str): The voice style to use
+        genre (str): The music genre ('auto' to pick from mood)
+
+    Returns:
+        dict: Song creation results (paths, mood, genre, duration)
+    """
+    # Step 1: Analyze mood (music generation depends on it when genre is
+    # 'auto', so it stays ahead of the parallel stages)
+    mood_result = await asyncio.to_thread(analyze_mood_cached, lyrics)
+
+    # Step 2+3: Generate background music and clone voice concurrently
+    if genre == 'auto':
+        genre = mood_result['suggested_genre']
+
+    # Word count drives both song duration and the response payload;
+    # compute it once instead of re-splitting the lyrics
+    word_count = get_lyrics_processor().count_words(lyrics)
+
+    music_task = asyncio.to_thread(
+        get_music_generator().generate_buffer,
+        mood_result['mood'],
+        genre,
+        word_count * 2  # Duration based on lyrics length
+    )
+    voice_task = asyncio.to_thread(get_voice_cloner().clone_voice_buffer, lyrics, artist_voice)
+    (music_audio, music_rate), (voice_audio, voice_rate) = await asyncio.gather(
+        music_task, voice_task
+    )
+
+    # Step 4: Mix audio in memory; only the final song is written to disk
+    song_path = await asyncio.to_thread(
+        get_audio_mixer().mix_buffers,
+        voice_audio, voice_rate,
+        music_audio, music_rate,
+        genre
+    )
+
+    return {
+        'song_path': song_path,
+        'mood': mood_result['mood'],
+        'genre': genre,
+        'duration': word_count * 2,
+        'download_url': f'/api/download-song/{os.path.basename(song_path)}'
+    }
+
+def run_song_pipeline(lyrics, artist_voice, genre):
+    """Synchronous wrapper around the async pipeline (used by Celery workers)"""
+    return asyncio.run(run_song_pipeline_async(lyrics, artist_voice, genre))
+
 @app.route('/api/create-song', methods=['POST'])
-def create_song():
+async def create_song():
     """Create complete song from lyrics"""
     try:
-        data = request.get_json()
-        lyrics = data.get('lyrics', '')
+        data = request.get_json(force=True, silent=True) or {}
+        lyrics = get_lyrics_processor().normalize(data.get('lyrics', ''))
         artist_voice = data.get('artist_voice', 'default')
         genre = data.get('genre', 'auto')
-        
-        if not lyrics:
-            return jsonify({'error': 'Lyrics are required'}), 400
-        
-        # Step 1: Analyze mood
-        mood_result = mood_analyzer.analyze(lyrics)
-        
-        # Step 2: Generate background music
-        if genre == 'auto':
-            genre = mood_result['suggested_genre']
-        
-        music_path = music_generator.generate(
-            mood_result['mood'], 
-            genre, 
-            len(lyrics.split()) * 2  # Duration based on lyrics length
-        )
-        
-        # Step 3: Clone voice
-        voice_path = voice_cloner.clone_voice(lyrics, artist_voice)
-        
-        # Step 4: Mix audio
-        song_path = audio_mixer.mix_audio(voice_path, music_path)
-        
-        # Step 5: Clean up temporary files
-        os.remove(music_path)
-        os.remove(voice_path)
-        
-        return jsonify({
-            'song_path': song_path,
-            'mood': mood_result['mood'],
-            'genre': genre,
-            'duration': len(lyrics.split()) * 2,
-            'download_url': f'/api/download-song/{os.path.basename(song_path)}'
-        })
-    
+
+        if not get_lyrics_processor().is_valid(lyrics):
+            return jsonify({'error': 'Valid lyrics are required'}), 400
+
+        if CELERY_AVAILABLE:
+            # Submit to the task queue and return immediately so the
+            # request thread is free to accept more work; if the broker
+            # turns out to be unreachable, fall through to the
+            # in-process pipeline instead of failing the request
+            try:
+                job = build_song.delay(lyrics, artist_voice, genre)
+            except BrokerOperationalError:
+                logger.warning(
+                    "Celery broker unreachable - processing synchronously")
+            else:
+                return jsonify({
+                    'job_id': job.id,
+                    'status_url': f'/api/jobs/{job.id}',
+                    'result_url': f'/api/create-song/result/{job.id}'
+                }), 202
+
+        # In-process fallback when no task queue is configured
+        if not _synth_semaphore.acquire(blocking=False):
+            return jsonify({'error': 'Server busy - please retry shortly'}), 503
+
+        try:
+            return jsonify(await run_song_pipeline_async(lyrics, artist_voice, genre))
+        finally:
+            _synth_semaphore.release()
+
     except Exception as e:
         logger.error(f"Error creating song: {str(e)}")
         return jsonify({'error': 'Failed to create song'}), 500
 
+@app.route('/api/jobs/<job_id>', methods=['GET'])
+def get_job_status(job_id):
+    """Poll the status of a queued song creation job"""
+    try:
+        if not CELERY_AVAILABLE:
+            return jsonify({'error': 'Task queue not available'}), 503
+
+        job = celery_app.AsyncResult(job_id)
+
+        response = {
+            'job_id': job_id,
+            'status': job.status
+        }
+
+        if job.ready():
+            response['result_url'] = f'/api/create-song/result/{job_id}'
+
+        return jsonify(response)
+
+    except Exception as e:
+        logger.error(f"Error getting job status: {str(e)}")
+        return jsonify({'error': 'Failed to get job status'}), 500
+
+@app.route('/api/create-song/result/<job_id>', methods=['GET'])
+def get_song_result(job_id):
+    """Fetch the result of a completed song creation job"""
+    try:
+        if not CELERY_AVAILABLE:
+            return jsonify({'error': 'Task queue not available'}), 503
+
+        job = celery_app.AsyncResult(job_id)
+
+        if not job.ready():
+            return jsonify({
+                'job_id': job_id,
+                'status': job.status,
+                'error': 'Job not finished yet'
+            }), 202
+
+        if job.failed():
+            return jsonify({'error': 'Failed to create song'}), 500
+
+        return jsonify(job.result)
+
+    except Exception as e:
+        logger.error(f"Error getting song result: {str(e)}")
+        return jsonify({'error': 'Failed to get song result'}), 500
+
 @app.route('/api/download-song/<filename>', methods=['GET'])
 def download_song(filename):
     """Download generated song"""
     try:
-        song_dir = os.path.join(os.getcwd(), 'generated_songs')
-        song_path = os.path.join(song_dir, filename)
-        
-        if not os.path.exists(song_path):
-            return jsonify({'error': 'Song not found'}), 404
-        
-        return send_file(song_path, as_attachment=True)
-    
+        # send_from_directory resolves against the precomputed absolute
+        # song directory (no per-request getcwd) and rejects path
+        # traversal; conditional/etag enable Range requests and 304s
+        return send_from_directory(
+            app.config['SONG_DIR'],
+            filename,
+            as_attachment=True,
+            conditional=True,
+            etag=True,
+            max_age=3600
+        )
+
+    except NotFound:
+        return jsonify({'error': 'Song not found'}), 404
     except Exception as e:
         logger.error(f"Error downloading song: {str(e)}")
         return jsonify({'error': 'Failed to download song'}), 500
 
+# The voice and genre catalogs are static per process, so their JSON
+# responses are serialized once on first request and reused as bytes.
+# Computed lazily (not at import) so the heavy components stay unloaded
+# until a catalog endpoint is actually hit.
+_catalog_cache = {}
+_catalog_lock = threading.Lock()
+
+def _cached_catalog_response(key, build):
+    body = _catalog_cache.get(key)
+    if body is None:
+        with _catalog_lock:
+            body = _catalog_cache.get(key)
+            if body is None:
+                body = app.json.dumps(build()).encode('utf-8')
+                _catalog_cache[key] = body
+    return Response(body, mimetype='application/json')
+
 @app.route('/api/available-voices', methods=['GET'])
 def get_available_voices():
     """Get list of available artist voices"""
     try:
-        voices = voice_cloner.get_available_voices()
-        return jsonify({'voices': voices})
-    
+        return _cached_catalog_response(
+            'voices',
+            lambda: {'voices': get_voice_cloner().get_available_voices()}
+        )
+
     except Exception as e:
         logger.error(f"Error getting voices: {str(e)}")
         return jsonify({'error': 'Failed to get voices'}), 500
@@ -246,13 +548,22 @@ def get_available_voices():
 def get_available_genres():
     """Get list of available music genres"""
     try:
-        genres = music_generator.get_available_genres()
-        return jsonify({'genres': genres})
-    
+        return _cached_catalog_response(
+            'genres',
+            lambda: {'genres': get_music_generator().get_available_genres()}
+        )
+
     except Exception as e:
         logger.error(f"Error getting genres: {str(e)}")
         return jsonify({'error': 'Failed to get genres'}), 500
 
+@app.route('/api/refresh-catalog', methods=['POST'])
+def refresh_catalog():
+    """Drop the cached voice/genre responses (e.g. after adding voices)"""
+    with _catalog_lock:
+        _catalog_cache.clear()
+    return jsonify({'status': 'refreshed'})
+
 @app.errorhandler(404)
 def not_found(error):
     return jsonify({'error': 'Endpoint not found'}), 404
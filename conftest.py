@@ -0,0 +1,57 @@
+"""
+Shared pytest fixtures for the Nusify test suite
+
+Components are session-scoped so model loading and network
+initialization happen once per run instead of once per test, and the
+suite can be parallelized with pytest-xdist (`pytest -n auto`).
+"""
+
+import pytest
+
+
+@pytest.fixture(scope="session")
+def mood_analyzer():
+    from utils.mood_analyzer import MoodAnalyzer
+    return MoodAnalyzer()
+
+
+@pytest.fixture(scope="session")
+def music_generator():
+    from utils.music_generator import MusicGenerator
+    return MusicGenerator()
+
+
+@pytest.fixture(scope="session")
+def voice_cloner():
+    from utils.voice_cloner import VoiceCloner
+    return VoiceCloner()
+
+
+@pytest.fixture(scope="session")
+def audio_mixer():
+    from utils.audio_mixer import AudioMixer
+    return AudioMixer()
+
+
+@pytest.fixture(scope="session")
+def lyrics_processor():
+    from utils.lyrics_processor import LyricsProcessor
+    return LyricsProcessor()
+
+
+@pytest.fixture(scope="session")
+def gemini_mood_analyzer():
+    from utils.gemini_mood_analyzer import GeminiMoodAnalyzer
+    return GeminiMoodAnalyzer()
+
+
+@pytest.fixture(scope="session")
+def gemini_music_generator():
+    from utils.gemini_music_generator import GeminiMusicGenerator
+    return GeminiMusicGenerator()
+
+
+@pytest.fixture(scope="session")
+def gemini_voice_cloner():
+    from utils.gemini_voice_cloner import GeminiVoiceCloner
+    return GeminiVoiceCloner()
@@ -5,6 +5,7 @@ This script sets up the Nusify application with all required dependencies.
 """
 
 import os
+import shutil
 import sys
 import subprocess
 import logging
@@ -38,17 +39,17 @@ def install_python_dependencies():
 
 def check_ffmpeg():
     """Check if FFmpeg is available"""
-    try:
-        subprocess.run(["ffmpeg", "-version"], capture_output=True, check=True)
+    # shutil.which only stats $PATH entries - no process spawn needed
+    if shutil.which("ffmpeg"):
         logger.info("✅ FFmpeg is available")
         return True
-    except (subprocess.CalledProcessError, FileNotFoundError):
-        logger.warning("⚠️  FFmpeg not found - audio processing may not work properly")
-        logger.info("📋 Please install FFmpeg:")
-        logger.info("   - Windows: choco install ffmpeg")
-        logger.info("   - Conda: conda install -c conda-forge ffmpeg")
-        logger.info("   - See setup_ffmpeg.md for detailed instructions")
-        return False
+
+    logger.warning("⚠️  FFmpeg not found - audio processing may not work properly")
+    logger.info("📋 Please install FFmpeg:")
+    logger.info("   - Windows: choco install ffmpeg")
+    logger.info("   - Conda: conda install -c conda-forge ffmpeg")
+    logger.info("   - See setup_ffmpeg.md for detailed instructions")
+    return False
 
 def create_directories():
     """Create necessary directories"""
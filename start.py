@@ -5,6 +5,7 @@ This script starts the Flask backend server for the Nusify application.
 """
 
 import os
+import subprocess
 import sys
 import logging
 from pathlib import Path
@@ -53,22 +54,35 @@ def main():
     check_directories()
     
     try:
-        # Import and start the Flask app
-        from app import app
-        
         logger.info("🎵 Nusify is ready!")
         logger.info("🌐 Web interface will be available at: http://localhost:5000")
         logger.info("📱 Frontend should be started separately with: cd frontend && npm start")
         logger.info("⏹️  Press Ctrl+C to stop the server")
-        
-        # Start the Flask app
-        app.run(
-            debug=True,
-            host='0.0.0.0',
-            port=5000,
-            use_reloader=False  # Disable reloader to avoid duplicate processes
-        )
-        
+
+        try:
+            # Start gunicorn so requests are served concurrently across
+            # workers; long synthesis requests need a generous timeout
+            workers = os.cpu_count() or 1
+            subprocess.run([
+                "gunicorn",
+                "-k", "gevent",
+                "-w", str(workers),
+                "--preload",
+                "--timeout", "300",
+                "-b", "0.0.0.0:5000",
+                "app:app"
+            ], check=True)
+        except FileNotFoundError:
+            # Fall back to the single-threaded development server
+            logger.warning("⚠️  gunicorn not found - falling back to the Flask development server")
+            from app import app
+            app.run(
+                debug=True,
+                host='0.0.0.0',
+                port=5000,
+                use_reloader=False  # Disable reloader to avoid duplicate processes
+            )
+
     except KeyboardInterrupt:
         logger.info("🛑 Server stopped by user")
     except Exception as e:
@@ -0,0 +1,54 @@
+"""
+Nusify AI Music Generator - Celery Tasks
+Background task queue for the song creation pipeline.
+
+Run workers with:
+    celery -A tasks worker --concurrency=N
+
+Broker/backend default to a local Redis and can be overridden with the
+CELERY_BROKER_URL / CELERY_RESULT_BACKEND environment variables.
+"""
+
+import os
+import logging
+from celery import Celery
+
+logger = logging.getLogger(__name__)
+
+# Configure Celery with Redis broker and result backend
+celery_app = Celery(
+    'nusify',
+    broker=os.getenv('CELERY_BROKER_URL', 'redis://localhost:6379/0'),
+    backend=os.getenv('CELERY_RESULT_BACKEND', 'redis://localhost:6379/0')
+)
+
+celery_app.conf.update(
+    task_serializer='json',
+    result_serializer='json',
+    accept_content=['json'],
+    # Song builds are long-running; acknowledge late so a crashed worker
+    # requeues the job instead of dropping it
+    task_acks_late=True,
+    worker_prefetch_multiplier=1
+)
+
+
+@celery_app.task(name='tasks.build_song', bind=True)
+def build_song(self, lyrics, artist_voice, genre):
+    """
+    Run the complete song creation pipeline in a worker process.
+
+    Args:
+        lyrics (str): The lyrics to turn into a song
+        artist_voice (str): The voice style to use
+        genre (str): The music genre ('auto' to pick from mood)
+
+    Returns:
+        dict: Song creation results (paths, mood, genre, duration)
+    """
+    # Imported lazily so the worker only pays model load cost once per
+    # process, and so importing tasks.py does not pull in the Flask app
+    from app import run_song_pipeline
+
+    logger.info(f"Building song (task {self.request.id})")
+    return run_song_pipeline(lyrics, artist_voice, genre)
@@ -0,0 +1,89 @@
+"""
+Numba-compiled synthesis kernels for the beat-based music generators
+
+The per-beat synthesis loops are pure numeric code over contiguous
+float arrays, so compiling them with nopython mode removes interpreter
+dispatch, fuses the oscillator and envelope math into one LLVM loop,
+and parallelizes across beats with prange. Import of this module fails
+cleanly when numba is not installed; callers fall back to their NumPy
+implementations.
+"""
+
+import numpy as np
+from numba import njit, prange
+
+# Shared sine wavetable: tone generation becomes a cache-resident
+# gather instead of a transcendental call per sample. 4096 entries keep
+# the worst-case phase error under 2*pi/4096 (about -66 dB), below
+# audibility for synthesized material.
+TABLE_SIZE = 4096
+SINE_TABLE = np.sin(2 * np.pi * np.arange(TABLE_SIZE) / TABLE_SIZE).astype(np.float32)
+
+
+@njit(parallel=True, fastmath=True, cache=True, boundscheck=False)
+def synth_tonal(freq_mat, amps, bounds, sample_rate, out):
+    """
+    Accumulate sinusoidal voices into `out`
+
+    freq_mat is (beats, voices) with a per-voice amplitude in `amps`;
+    zero entries are skipped, so melody, chord notes and bass of
+    different counts share one rectangular matrix and every voice is
+    rendered in a single fused pass. Each beat spans
+    out[bounds[i]:bounds[i+1]] with the per-beat linspace time base the
+    Python loops used (step = dur / (sr * (dur - 1))). Sines come from
+    the shared wavetable rather than per-sample transcendentals.
+    """
+    beats = freq_mat.shape[0]
+    voices = freq_mat.shape[1]
+    for i in prange(beats):
+        start = bounds[i]
+        dur = bounds[i + 1] - start
+        if dur <= 0:
+            continue
+        step = dur / (sample_rate * (dur - 1)) if dur > 1 else 0.0
+        for j in range(dur):
+            t = j * step
+            acc = 0.0
+            for k in range(voices):
+                f = freq_mat[i, k]
+                if f > 0:
+                    idx = int(f * t * TABLE_SIZE) & (TABLE_SIZE - 1)
+                    acc += amps[k] * SINE_TABLE[idx]
+            out[start + j] += acc
+
+
+@njit(parallel=True, fastmath=True, cache=True, boundscheck=False)
+def synth_drum(hits, offsets, bounds, kick_table, snare_env, noise, amplitude, out):
+    """
+    Accumulate kick + snare hits into `out`
+
+    kick_table and snare_env are one-shot tables precomputed at the
+    output rate; noise is a shared table read at a per-beat random
+    offset (modulo its length), so hits are pure table lookups with no
+    per-beat allocation or exp evaluation.
+    """
+    beats = hits.shape[0]
+    table_len = kick_table.shape[0]
+    noise_len = noise.shape[0]
+    for i in prange(beats):
+        if hits[i]:
+            start = bounds[i]
+            dur = min(bounds[i + 1] - start, table_len)
+            offset = offsets[i]
+            for j in range(dur):
+                snare = noise[(offset + j) % noise_len] * snare_env[j]
+                out[start + j] += (kick_table[j] + snare * 0.5) * amplitude
+
+
+def warmup():
+    """Trigger JIT compilation (or numba's disk-cache load) eagerly"""
+    bounds = np.array([0, 4], dtype=np.int64)
+    out = np.zeros(4, dtype=np.float32)
+    synth_tonal(np.full((1, 1), 440.0, dtype=np.float32),
+                np.ones(1, dtype=np.float32), bounds, 44100.0, out)
+    table = np.zeros(4, dtype=np.float32)
+    synth_drum(np.ones(1, dtype=np.int64), np.zeros(1, dtype=np.int64), bounds,
+               table, table, table, 1.0, out)
+
+
+warmup()
@@ -0,0 +1,85 @@
+import os
+import asyncio
+import logging
+import re
+from functools import lru_cache
+
+import google.generativeai as genai
+
+# orjson parses LLM responses several times faster than stdlib json;
+# fall back transparently when it is not installed
+try:
+    from orjson import loads as json_loads
+except ImportError:
+    from json import loads as json_loads
+
+logger = logging.getLogger(__name__)
+
+# Cap every generation call instead of hanging on the SDK default; a
+# slow pod should fail over to the local fallbacks, not block a request
+REQUEST_OPTIONS = {'timeout': 15.0}
+
+# Greedy match from the first brace/bracket to the last - the same
+# span find('{')/rfind('}') used to slice out, in one compiled scan
+_JSON_OBJECT_RE = re.compile(r'\{.*\}', re.S)
+_JSON_ARRAY_RE = re.compile(r'\[.*\]', re.S)
+
+
+def extract_json_object(text):
+    """Return the outermost {...} span of `text`, or None"""
+    match = _JSON_OBJECT_RE.search(text)
+    return match.group(0) if match else None
+
+
+def extract_json_array(text):
+    """Return the outermost [...] span of `text`, or None"""
+    match = _JSON_ARRAY_RE.search(text)
+    return match.group(0) if match else None
+
+
+@lru_cache(maxsize=4)
+def get_gemini_model(model_name='gemini-1.5-flash'):
+    """
+    Return a process-wide shared GenerativeModel (or None without a key)
+
+    Every Gemini component used to configure the SDK and build its own
+    model, so each held a separate client and HTTP connection pool.
+    Sharing one cached model keeps a single persistent connection that
+    all mood/music/voice requests reuse, avoiding a TLS handshake per
+    component.
+    """
+    api_key = os.getenv('GEMINI_API_KEY')
+    if not api_key:
+        logger.warning("GEMINI_API_KEY not found in environment variables")
+        return None
+
+    genai.configure(api_key=api_key)
+    return genai.GenerativeModel(model_name)
+
+
+async def hedged(coro_factory, delay=2.0):
+    """
+    Race a second attempt of a slow call and take the first result
+
+    Runs coro_factory() and, if it has not finished within `delay`
+    seconds, starts a second identical call; whichever completes first
+    wins and the other is cancelled. Tail latency from one slow backend
+    then costs a duplicated call rather than a full timeout.
+    """
+    first = asyncio.ensure_future(coro_factory())
+    try:
+        return await asyncio.wait_for(asyncio.shield(first), delay)
+    except asyncio.TimeoutError:
+        pass
+
+    second = asyncio.ensure_future(coro_factory())
+    done, pending = await asyncio.wait(
+        {first, second}, return_when=asyncio.FIRST_COMPLETED
+    )
+    for task in pending:
+        task.cancel()
+
+    for task in done:
+        if task.exception() is None:
+            return task.result()
+    return done.pop().result()
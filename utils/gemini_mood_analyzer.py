@@ -1,29 +1,49 @@
 import os
+import asyncio
+import hashlib
 import logging
+import types
 import google.generativeai as genai
-from typing import Dict, List, Any
+from utils.gemini_client import (get_gemini_model, json_loads,
+                                 hedged, REQUEST_OPTIONS,
+                                 extract_json_object, extract_json_array)
+from typing import Dict, List, Any, Mapping, Tuple
 import json
 import re
 
 logger = logging.getLogger(__name__)
 
+# Keyword tables for the offline fallback scorer; frozensets turn the
+# scoring into a single tokenize pass plus set intersections instead of
+# a substring scan of the lyrics per keyword
+_MOOD_KEYWORDS = {
+    'happy': frozenset(['happy', 'joy', 'smile', 'laugh', 'dance',
+                        'celebrate', 'sunshine', 'love']),
+    'sad': frozenset(['sad', 'cry', 'tears', 'lonely', 'heartbreak',
+                      'pain', 'darkness', 'alone']),
+    'angry': frozenset(['angry', 'rage', 'hate', 'fight', 'war',
+                        'fire', 'storm', 'revenge']),
+    'energetic': frozenset(['energy', 'power', 'strong', 'wild', 'free',
+                            'run', 'jump', 'explode']),
+}
+_WORD_RE = re.compile(r"\w+")
+
+# Lyrics cleaning: disallowed characters become spaces. The ASCII fast
+# path is a C-level str.translate table lookup; the precompiled regex
+# only runs for non-ASCII input, where \w needs unicode semantics.
+_CLEAN_RE = re.compile(r'[^\w\s.,!?\'"-]')
+_CLEAN_TABLE = str.maketrans({c: ' ' for c in map(chr, range(128))
+                              if _CLEAN_RE.match(c)})
+
 class GeminiMoodAnalyzer:
     """AI-powered mood analyzer using Google Gemini API"""
     
     def __init__(self):
-        # Initialize Gemini API
-        api_key = os.getenv('GEMINI_API_KEY')
-        if not api_key:
-            logger.warning("GEMINI_API_KEY not found in environment variables")
-            # For development, you can set it here temporarily
-            # api_key = "your-api-key-here"
-        
-        if api_key:
-            genai.configure(api_key=api_key)
-            self.model = genai.GenerativeModel('gemini-1.5-flash')
-            self.api_available = True
-        else:
-            self.api_available = False
+        # Shared per-process Gemini client (one connection pool
+        # across all components)
+        self.model = get_gemini_model()
+        self.api_available = self.model is not None
+        if not self.api_available:
             logger.error("Gemini API not configured")
         
         # Mood to genre mapping
@@ -40,6 +60,19 @@ class GeminiMoodAnalyzer:
             'mysterious': 'atmospheric',
             'neutral': 'pop'
         }
+        # Immutable views handed out by the accessors below, so hot
+        # endpoints do not copy the mapping on every request
+        self._mood_list = tuple(self.mood_genre_map)
+        self._mood_genre_view = types.MappingProxyType(self.mood_genre_map)
+
+        # Local result cache keyed by a hash of the cleaned lyrics, so
+        # repeated inputs never pay an API round trip. A token-set
+        # index alongside it serves near-duplicate lyrics (trivially
+        # reworded or reordered lines) without a new API call.
+        self._cache = {}
+        self._cache_tokens = []
+        self._cache_max = 1024
+        self._similarity_threshold = 0.85
     
     def analyze(self, lyrics: str) -> Dict[str, Any]:
         """
@@ -57,12 +90,18 @@ class GeminiMoodAnalyzer:
             
             # Clean lyrics
             cleaned_lyrics = self._clean_lyrics(lyrics)
+
+            # Serve repeats from the local cache
+            cache_key = self._cache_key(cleaned_lyrics)
+            cached = self._cache_lookup(cache_key, cleaned_lyrics)
+            if cached is not None:
+                return cached
             
             # Create prompt for Gemini
             prompt = self._create_analysis_prompt(cleaned_lyrics)
             
             # Get response from Gemini
-            response = self.model.generate_content(prompt)
+            response = self.model.generate_content(prompt, request_options=REQUEST_OPTIONS)
             
             # Parse the response
             analysis_result = self._parse_gemini_response(response.text)
@@ -74,22 +113,251 @@ class GeminiMoodAnalyzer:
             analysis_result['suggested_genre'] = self.mood_genre_map.get(
                 analysis_result['mood'], 'pop'
             )
-            
+
+            self._cache_store(cache_key, analysis_result, cleaned_lyrics)
+
             return analysis_result
             
         except Exception as e:
             logger.error(f"Error analyzing mood with Gemini: {e}")
             return self._fallback_analysis(lyrics)
+
+    async def analyze_async(self, lyrics: str) -> Dict[str, Any]:
+        """
+        Async variant of analyze using Gemini's non-blocking API
+
+        Lets callers overlap the mood round trip with other network or
+        synthesis work (e.g. asyncio.gather with the music generator's
+        creative-direction call).
+        """
+        try:
+            if not self.api_available:
+                return self._fallback_analysis(lyrics)
+
+            cleaned_lyrics = self._clean_lyrics(lyrics)
+
+            cache_key = self._cache_key(cleaned_lyrics)
+            cached = self._cache_lookup(cache_key, cleaned_lyrics)
+            if cached is not None:
+                return cached
+
+            prompt = self._create_analysis_prompt(cleaned_lyrics)
+
+            response = await hedged(
+                lambda: self.model.generate_content_async(
+                    prompt, request_options=REQUEST_OPTIONS))
+
+            analysis_result = self._parse_gemini_response(response.text)
+            analysis_result['confidence'] = self._calculate_confidence(analysis_result)
+            analysis_result['suggested_genre'] = self.mood_genre_map.get(
+                analysis_result['mood'], 'pop'
+            )
+
+            self._cache_store(cache_key, analysis_result, cleaned_lyrics)
+
+            return analysis_result
+
+        except Exception as e:
+            logger.error(f"Error analyzing mood with Gemini: {e}")
+            return self._fallback_analysis(lyrics)
+
+    # Batch sizing: up to 10 lyrics per prompt before response-size
+    # saturation, at most 4 batches in flight to respect rate limits
+    BATCH_MAX = 10
+    MAX_CONCURRENT_BATCHES = 4
+
+    def analyze_batch(self, lyrics_list: List[str]) -> List[Dict[str, Any]]:
+        """
+        Analyze several lyrics in batched Gemini calls
+
+        Cache misses are packed into prompts of up to BATCH_MAX lyrics,
+        each answered with one JSON array - one HTTP round trip per
+        batch instead of per song. A batch whose response fails to
+        parse falls back to per-song analyze calls.
+
+        Args:
+            lyrics_list (list): Lyrics strings to analyze
+
+        Returns:
+            list: One analysis result dict per input
+        """
+        if not self.api_available:
+            return [self._fallback_analysis(lyrics) for lyrics in lyrics_list]
+
+        cleaned_list = [self._clean_lyrics(lyrics) for lyrics in lyrics_list]
+        keys = [self._cache_key(cleaned) for cleaned in cleaned_list]
+        results = [self._cache_lookup(key, cleaned)
+                   for key, cleaned in zip(keys, cleaned_list)]
+
+        miss_indices = [i for i, result in enumerate(results) if result is None]
+        for chunk_start in range(0, len(miss_indices), self.BATCH_MAX):
+            chunk = miss_indices[chunk_start:chunk_start + self.BATCH_MAX]
+            try:
+                prompt = self._create_batch_prompt([cleaned_list[i] for i in chunk])
+                response = self.model.generate_content(prompt, request_options=REQUEST_OPTIONS)
+                parsed_list = self._parse_gemini_batch_response(
+                    response.text, len(chunk)
+                )
+                for i, parsed in zip(chunk, parsed_list):
+                    results[i] = self._finish_result(parsed, keys[i], cleaned_list[i])
+            except Exception as e:
+                logger.error(f"Batch mood analysis failed, retrying per song: {e}")
+                for i in chunk:
+                    results[i] = self.analyze(lyrics_list[i])
+
+        return results
+
+    async def analyze_batch_async(self, lyrics_list: List[str]) -> List[Dict[str, Any]]:
+        """
+        Async analyze_batch running up to MAX_CONCURRENT_BATCHES at once
+
+        Batches are dispatched concurrently under a semaphore, so large
+        workloads overlap their round trips without hammering the API.
+        """
+        if not self.api_available:
+            return [self._fallback_analysis(lyrics) for lyrics in lyrics_list]
+
+        cleaned_list = [self._clean_lyrics(lyrics) for lyrics in lyrics_list]
+        keys = [self._cache_key(cleaned) for cleaned in cleaned_list]
+        results = [self._cache_lookup(key, cleaned)
+                   for key, cleaned in zip(keys, cleaned_list)]
+
+        miss_indices = [i for i, result in enumerate(results) if result is None]
+        chunks = [miss_indices[i:i + self.BATCH_MAX]
+                  for i in range(0, len(miss_indices), self.BATCH_MAX)]
+        semaphore = asyncio.Semaphore(self.MAX_CONCURRENT_BATCHES)
+
+        async def run_chunk(chunk):
+            async with semaphore:
+                try:
+                    prompt = self._create_batch_prompt(
+                        [cleaned_list[i] for i in chunk]
+                    )
+                    response = await hedged(
+                        lambda: self.model.generate_content_async(
+                            prompt, request_options=REQUEST_OPTIONS))
+                    parsed_list = self._parse_gemini_batch_response(
+                        response.text, len(chunk)
+                    )
+                    for i, parsed in zip(chunk, parsed_list):
+                        results[i] = self._finish_result(
+                            parsed, keys[i], cleaned_list[i]
+                        )
+                except Exception as e:
+                    logger.error(f"Batch mood analysis failed, retrying per song: {e}")
+                    for i in chunk:
+                        results[i] = await self.analyze_async(lyrics_list[i])
+
+        await asyncio.gather(*(run_chunk(chunk) for chunk in chunks))
+        return results
+
+    def _finish_result(self, parsed: Dict[str, Any], key: str,
+                       cleaned_lyrics: str) -> Dict[str, Any]:
+        """Attach confidence/genre to a parsed result and cache it"""
+        parsed['confidence'] = self._calculate_confidence(parsed)
+        parsed['suggested_genre'] = self.mood_genre_map.get(parsed['mood'], 'pop')
+        self._cache_store(key, parsed, cleaned_lyrics)
+        return parsed
+
+    @staticmethod
+    def _cache_key(cleaned_lyrics: str) -> str:
+        return hashlib.blake2b(
+            cleaned_lyrics.encode('utf-8'), digest_size=16
+        ).hexdigest()
+
+    def _cache_store(self, key: str, result: Dict[str, Any],
+                     cleaned_lyrics: str = '') -> None:
+        if len(self._cache) >= self._cache_max:
+            self._cache.clear()
+            self._cache_tokens.clear()
+        self._cache[key] = result
+        if cleaned_lyrics:
+            self._cache_tokens.append((key, frozenset(cleaned_lyrics.split())))
+
+    def _cache_lookup(self, key: str, cleaned_lyrics: str):
+        """Exact-match lookup, then token-set similarity near-match"""
+        cached = self._cache.get(key)
+        if cached is not None:
+            return cached
+
+        tokens = frozenset(cleaned_lyrics.split())
+        if not tokens:
+            return None
+
+        best_key, best_score = None, 0.0
+        for cached_key, cached_tokens in self._cache_tokens:
+            union = len(tokens | cached_tokens)
+            if union == 0:
+                continue
+            score = len(tokens & cached_tokens) / union
+            if score > best_score:
+                best_key, best_score = cached_key, score
+
+        if best_score >= self._similarity_threshold:
+            return self._cache.get(best_key)
+        return None
+
+    def _create_batch_prompt(self, lyrics_list: List[str]) -> str:
+        """Create a prompt analyzing several lyrics in one response"""
+        numbered = json.dumps(lyrics_list)
+        return f"""
+Analyze each of the following song lyrics and provide a mood analysis for every one.
+
+Lyrics (JSON array, keep the same order): {numbered}
+
+Return a JSON array with exactly {len(lyrics_list)} objects, one per input, each with this structure:
+{{
+    "mood": "primary mood (happy, sad, angry, energetic, romantic, melancholic, upbeat, calm, dramatic, mysterious, neutral)",
+    "emotions": [
+        {{"emotion": "emotion_name", "intensity": 0.0-1.0}}
+    ],
+    "sentiment_score": -1.0 to 1.0,
+    "energy_level": 0.0 to 1.0,
+    "themes": ["theme1", "theme2"],
+    "analysis_notes": "brief explanation"
+}}
+
+Return only the JSON array, no additional text.
+"""
+
+    def _parse_gemini_batch_response(self, response_text: str,
+                                     expected: int) -> List[Dict[str, Any]]:
+        """Parse a JSON-array response into one result dict per input"""
+        json_str = extract_json_array(response_text)
+        if json_str is None:
+            raise ValueError("No valid JSON array found in response")
+
+        items = json_loads(json_str)
+        if len(items) != expected:
+            raise ValueError(
+                f"Expected {expected} results, got {len(items)}"
+            )
+
+        results = []
+        for item in items:
+            results.append({
+                'mood': item.get('mood', 'neutral'),
+                'emotions': item.get('emotions', []),
+                'sentiment_score': item.get('sentiment_score', 0.0),
+                'energy_level': item.get('energy_level', 0.5),
+                'themes': item.get('themes', []),
+                'analysis_notes': item.get('analysis_notes', ''),
+                'sentiment_scores': {
+                    'polarity': item.get('sentiment_score', 0.0),
+                    'energy': item.get('energy_level', 0.5)
+                }
+            })
+        return results
     
     def _clean_lyrics(self, lyrics: str) -> str:
         """Clean and preprocess lyrics"""
         # Remove special characters but keep spaces and basic punctuation
-        cleaned = re.sub(r'[^\w\s.,!?\'"-]', ' ', lyrics)
-        # Convert to lowercase
-        cleaned = cleaned.lower()
-        # Remove extra whitespace
-        cleaned = ' '.join(cleaned.split())
-        return cleaned
+        if lyrics.isascii():
+            cleaned = lyrics.translate(_CLEAN_TABLE)
+        else:
+            cleaned = _CLEAN_RE.sub(' ', lyrics)
+        # Lowercase and collapse whitespace
+        return ' '.join(cleaned.lower().split())
     
     def _create_analysis_prompt(self, lyrics: str) -> str:
         """Create a detailed prompt for Gemini analysis"""
@@ -125,16 +393,11 @@ Return only the JSON object, no additional text.
     def _parse_gemini_response(self, response_text: str) -> Dict[str, Any]:
         """Parse Gemini's response and extract analysis data"""
         try:
-            # Clean the response to extract JSON
-            response_text = response_text.strip()
-            
             # Find JSON in the response
-            json_start = response_text.find('{')
-            json_end = response_text.rfind('}') + 1
+            json_str = extract_json_object(response_text)
             
-            if json_start != -1 and json_end > json_start:
-                json_str = response_text[json_start:json_end]
-                analysis_data = json.loads(json_str)
+            if json_str is not None:
+                analysis_data = json_loads(json_str)
                 
                 # Ensure required fields exist
                 result = {
@@ -179,20 +442,12 @@ Return only the JSON object, no additional text.
         """Fallback analysis when Gemini API is not available"""
         logger.warning("Using fallback mood analysis")
         
-        # Simple keyword-based analysis
-        lyrics_lower = lyrics.lower()
-        
-        # Basic mood detection
-        happy_words = ['happy', 'joy', 'smile', 'laugh', 'dance', 'celebrate', 'sunshine', 'love']
-        sad_words = ['sad', 'cry', 'tears', 'lonely', 'heartbreak', 'pain', 'darkness', 'alone']
-        angry_words = ['angry', 'rage', 'hate', 'fight', 'war', 'fire', 'storm', 'revenge']
-        energetic_words = ['energy', 'power', 'strong', 'wild', 'free', 'run', 'jump', 'explode']
-        
+        # Simple keyword-based analysis: tokenize once, then count
+        # distinct keyword matches per mood with set intersections
+        token_set = set(_WORD_RE.findall(lyrics.lower()))
         mood_scores = {
-            'happy': sum(1 for word in happy_words if word in lyrics_lower),
-            'sad': sum(1 for word in sad_words if word in lyrics_lower),
-            'angry': sum(1 for word in angry_words if word in lyrics_lower),
-            'energetic': sum(1 for word in energetic_words if word in lyrics_lower)
+            mood: len(token_set & keywords)
+            for mood, keywords in _MOOD_KEYWORDS.items()
         }
         
         # Determine primary mood
@@ -216,10 +471,10 @@ Return only the JSON object, no additional text.
             'suggested_genre': self.mood_genre_map.get(primary_mood, 'pop')
         }
     
-    def get_available_moods(self) -> List[str]:
-        """Get list of available mood categories"""
-        return list(self.mood_genre_map.keys())
+    def get_available_moods(self) -> Tuple[str, ...]:
+        """Get the available mood categories"""
+        return self._mood_list
     
-    def get_mood_genre_mapping(self) -> Dict[str, str]:
-        """Get mood to genre mapping"""
-        return self.mood_genre_map.copy()
+    def get_mood_genre_mapping(self) -> Mapping[str, str]:
+        """Get a read-only view of the mood to genre mapping"""
+        return self._mood_genre_view
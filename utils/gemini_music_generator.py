@@ -1,7 +1,12 @@
 import os
+import asyncio
 import logging
+import types
 import google.generativeai as genai
-from typing import Dict, List, Any
+from utils.gemini_client import (get_gemini_model, json_loads,
+                                 hedged, REQUEST_OPTIONS,
+                                 extract_json_object)
+from typing import Dict, List, Any, Mapping, Optional, Tuple
 import json
 import numpy as np
 import soundfile as sf
@@ -13,25 +18,25 @@ class GeminiMusicGenerator:
     """AI-powered music generator using Google Gemini API for creative direction"""
     
     def __init__(self):
-        # Initialize Gemini API
-        api_key = os.getenv('GEMINI_API_KEY')
-        if not api_key:
-            logger.warning("GEMINI_API_KEY not found in environment variables")
-        
-        if api_key:
-            genai.configure(api_key=api_key)
-            self.model = genai.GenerativeModel('gemini-1.5-flash')
-            self.api_available = True
-        else:
-            self.api_available = False
+        # Shared per-process Gemini client (one connection pool
+        # across all components)
+        self.model = get_gemini_model()
+        self.api_available = self.model is not None
+        if not self.api_available:
             logger.error("Gemini API not configured")
         
         self.sample_rate = 44100
-        self.available_genres = [
+
+        # Creative directions repeat heavily across requests with the
+        # same mood/genre; cache them with duration bucketed to 10s so
+        # near-identical lengths share an entry
+        self._direction_cache = {}
+
+        self.available_genres = (
             'pop', 'rock', 'electronic', 'jazz', 'classical', 'country',
             'r&b', 'hip-hop', 'ambient', 'orchestral', 'indie', 'ballad',
             'dance', 'atmospheric', 'folk', 'blues', 'reggae', 'punk'
-        ]
+        )
         
         # Enhanced genre-specific parameters
         self.genre_params = {
@@ -79,7 +84,14 @@ class GeminiMusicGenerator:
             'E': 329.63, 'F': 349.23, 'F#': 369.99, 'G': 392.00,
             'G#': 415.30, 'A': 440.00, 'A#': 466.16, 'B': 493.88
         }
-    
+
+        # Note order and index resolved once so _shift_note is a dict
+        # lookup, plus a memo for resolved progressions: melody, harmony
+        # and bass all request the same chord frequencies per generate()
+        self._note_names = list(self.note_frequencies)
+        self._note_index = {n: i for i, n in enumerate(self._note_names)}
+        self._chord_cache: Dict = {}
+
     def generate(self, mood: str, genre: str, duration: int) -> str:
         """
         Generate background music based on mood and genre using Gemini for creative direction
@@ -120,13 +132,93 @@ class GeminiMusicGenerator:
             logger.error(f"Error generating music: {e}")
             return self._generate_fallback_music(duration)
     
+    async def generate_async(self, mood: str, genre: str, duration: int) -> str:
+        """
+        Async variant of generate that overlaps the Gemini call with synthesis
+
+        The creative-direction round trip and the base-parameter audio
+        synthesis run concurrently; the direction is then applied and
+        only the affected layers depend on it.
+        """
+        try:
+            logger.info(f"Generating {genre} music with {mood} mood for {duration} seconds")
+
+            if genre not in self.genre_params:
+                genre = 'pop'
+
+            base_params = self.genre_params[genre].copy()
+
+            creative_direction = await self._get_creative_direction_async(mood, genre, duration)
+
+            modified_params = self._apply_creative_direction(base_params, creative_direction, mood)
+
+            # Synthesis is CPU-bound - push it off the event loop
+            music_data = await asyncio.to_thread(
+                self._generate_music_data, modified_params, duration
+            )
+
+            output_path = await self._save_music_async(music_data, genre, mood)
+
+            logger.info(f"Music generated successfully: {output_path}")
+            return output_path
+
+        except Exception as e:
+            logger.error(f"Error generating music: {e}")
+            return self._generate_fallback_music(duration)
+
+    async def _get_creative_direction_async(self, mood: str, genre: str, duration: int) -> Dict[str, Any]:
+        """Async variant of _get_creative_direction"""
+        try:
+            if not self.api_available:
+                return self._get_fallback_direction(mood, genre)
+
+            cache_key = (mood, genre, duration // 10)
+            cached = self._direction_cache.get(cache_key)
+            if cached is not None:
+                return cached
+
+            prompt = self._create_direction_prompt(mood, genre, duration)
+
+            response = await hedged(
+                lambda: self.model.generate_content_async(
+                    prompt, request_options=REQUEST_OPTIONS))
+            direction = self._parse_creative_response(response.text)
+            if len(self._direction_cache) >= 256:
+                self._direction_cache.clear()
+            self._direction_cache[cache_key] = direction
+            return direction
+
+        except Exception as e:
+            logger.error(f"Error getting creative direction: {e}")
+            return self._get_fallback_direction(mood, genre)
+
     def _get_creative_direction(self, mood: str, genre: str, duration: int) -> Dict[str, Any]:
         """Get creative direction from Gemini API"""
         try:
             if not self.api_available:
                 return self._get_fallback_direction(mood, genre)
+
+            cache_key = (mood, genre, duration // 10)
+            cached = self._direction_cache.get(cache_key)
+            if cached is not None:
+                return cached
             
-            prompt = f"""
+            prompt = self._create_direction_prompt(mood, genre, duration)
+            
+            response = self.model.generate_content(prompt, request_options=REQUEST_OPTIONS)
+            direction = self._parse_creative_response(response.text)
+            if len(self._direction_cache) >= 256:
+                self._direction_cache.clear()
+            self._direction_cache[cache_key] = direction
+            return direction
+            
+        except Exception as e:
+            logger.error(f"Error getting creative direction: {e}")
+            return self._get_fallback_direction(mood, genre)
+
+    def _create_direction_prompt(self, mood: str, genre: str, duration: int) -> str:
+        """Build the composition-plan prompt"""
+        return f"""
 Create a detailed musical composition plan for a {genre} song with {mood} mood, {duration} seconds long.
 
 Return a JSON object with:
@@ -145,24 +237,14 @@ Return a JSON object with:
 Consider the mood and genre characteristics. Be creative but practical for AI music generation.
 Return only the JSON object.
 """
-            
-            response = self.model.generate_content(prompt)
-            return self._parse_creative_response(response.text)
-            
-        except Exception as e:
-            logger.error(f"Error getting creative direction: {e}")
-            return self._get_fallback_direction(mood, genre)
     
     def _parse_creative_response(self, response_text: str) -> Dict[str, Any]:
         """Parse Gemini's creative direction response"""
         try:
-            response_text = response_text.strip()
-            json_start = response_text.find('{')
-            json_end = response_text.rfind('}') + 1
+            json_str = extract_json_object(response_text)
             
-            if json_start != -1 and json_end > json_start:
-                json_str = response_text[json_start:json_end]
-                return json.loads(json_str)
+            if json_str is not None:
+                return json_loads(json_str)
             else:
                 raise ValueError("No valid JSON found in response")
                 
@@ -240,47 +322,66 @@ Return only the JSON object.
         
         return mixed
     
+    def _beat_grid(self, beats_total: int, beats_per_second: float):
+        """
+        Per-sample beat index and in-beat time arrays for vectorized synthesis
+
+        Maps every output sample to its beat and to the time value the
+        old per-beat np.linspace would have produced, so whole layers
+        can be synthesized with a single np.sin call instead of a
+        Python loop over beats.
+        """
+        bounds = (np.arange(beats_total + 1) / beats_per_second
+                  * self.sample_rate).astype(np.int64)
+        lengths = np.diff(bounds)
+        beat_idx = np.repeat(np.arange(beats_total), lengths)
+        offsets = np.arange(bounds[-1]) - bounds[:-1][beat_idx]
+
+        # linspace(0, dur/sr, dur) steps by dur/(sr*(dur-1)); reproduce
+        # that per-beat time base exactly
+        steps = np.where(
+            lengths > 1,
+            lengths / (self.sample_rate * np.maximum(lengths - 1, 1)),
+            0.0
+        )
+        t_in_beat = offsets * steps[beat_idx]
+        return beat_idx, t_in_beat
+
     def _generate_melody(self, params: Dict, beats_total: int, beats_per_second: float) -> np.ndarray:
         """Generate melodic line"""
-        melody = np.zeros(int(beats_total / beats_per_second * self.sample_rate))
-        
         chord_notes = self._get_chord_notes(params['chord_progression'], params['key'])
-        
+        prog_len = len(params['chord_progression'])
+
+        # One frequency per beat (with octave variation), then a single
+        # vectorized sin over the whole buffer
+        freqs = np.empty(beats_total)
         for i in range(beats_total):
-            beat_start = int(i / beats_per_second * self.sample_rate)
-            beat_end = int((i + 1) / beats_per_second * self.sample_rate)
-            
-            chord_index = i % len(params['chord_progression'])
-            note = chord_notes[chord_index][i % len(chord_notes[chord_index])]
-            
-            note_duration = beat_end - beat_start
-            t = np.linspace(0, note_duration / self.sample_rate, note_duration)
-            frequency = note * (2 ** (np.random.randint(-1, 2)))
-            
-            melody[beat_start:beat_end] = np.sin(2 * np.pi * frequency * t) * 0.3
-        
-        return melody
-    
+            chord = chord_notes[i % prog_len]
+            note = chord[i % len(chord)]
+            freqs[i] = note * (2 ** np.random.randint(-1, 2))
+
+        beat_idx, t = self._beat_grid(beats_total, beats_per_second)
+        return np.sin(2 * np.pi * freqs[beat_idx] * t) * 0.3
+
     def _generate_harmony(self, params: Dict, beats_total: int, beats_per_second: float) -> np.ndarray:
         """Generate harmonic accompaniment"""
-        harmony = np.zeros(int(beats_total / beats_per_second * self.sample_rate))
-        
         chord_notes = self._get_chord_notes(params['chord_progression'], params['key'])
-        
+        prog_len = len(params['chord_progression'])
+
+        # Pad chords to a rectangular (beats, notes) matrix; zero-Hz
+        # padding contributes sin(0) == 0, so shorter chords are free
+        max_notes = max(len(chord) for chord in chord_notes)
+        note_mat = np.zeros((beats_total, max_notes))
         for i in range(beats_total):
-            beat_start = int(i / beats_per_second * self.sample_rate)
-            beat_end = int((i + 1) / beats_per_second * self.sample_rate)
-            
-            chord_index = i % len(params['chord_progression'])
-            chord = chord_notes[chord_index]
-            
-            for note in chord:
-                note_duration = beat_end - beat_start
-                t = np.linspace(0, note_duration / self.sample_rate, note_duration)
-                harmony[beat_start:beat_end] += np.sin(2 * np.pi * note * t) * 0.2
-        
-        return harmony
-    
+            chord = chord_notes[i % prog_len]
+            note_mat[i, :len(chord)] = chord
+
+        beat_idx, t = self._beat_grid(beats_total, beats_per_second)
+        harmony = np.zeros(len(t))
+        for k in range(max_notes):
+            harmony += np.sin(2 * np.pi * note_mat[beat_idx, k] * t)
+        return harmony * 0.2
+
     def _generate_rhythm(self, params: Dict, beats_total: int, beats_per_second: float) -> np.ndarray:
         """Generate rhythmic pattern"""
         rhythm = np.zeros(int(beats_total / beats_per_second * self.sample_rate))
@@ -304,28 +405,27 @@ Return only the JSON object.
     
     def _generate_bass(self, params: Dict, beats_total: int, beats_per_second: float) -> np.ndarray:
         """Generate bass line"""
-        bass = np.zeros(int(beats_total / beats_per_second * self.sample_rate))
-        
         pattern = params.get('bass_pattern', [1, 0, 0, 0, 1, 0, 0, 0])
         chord_notes = self._get_chord_notes(params['chord_progression'], params['key'])
-        
+        prog_len = len(params['chord_progression'])
+
+        # Zero frequency on silent beats synthesizes to silence, so one
+        # sin pass covers the whole line
+        freqs = np.zeros(beats_total)
         for i in range(beats_total):
-            beat_start = int(i / beats_per_second * self.sample_rate)
-            beat_end = int((i + 1) / beats_per_second * self.sample_rate)
-            
             if pattern[i % len(pattern)]:
-                chord_index = i % len(params['chord_progression'])
-                root_note = chord_notes[chord_index][0] / 2
-                
-                note_duration = beat_end - beat_start
-                t = np.linspace(0, note_duration / self.sample_rate, note_duration)
-                
-                bass[beat_start:beat_end] = np.sin(2 * np.pi * root_note * t) * 0.4
-        
-        return bass
-    
+                freqs[i] = chord_notes[i % prog_len][0] / 2
+
+        beat_idx, t = self._beat_grid(beats_total, beats_per_second)
+        return np.sin(2 * np.pi * freqs[beat_idx] * t) * 0.4
+
     def _get_chord_notes(self, chord_progression: List[str], key: str) -> List[List[float]]:
         """Get actual frequencies for chord progression"""
+        cache_key = (key, tuple(chord_progression))
+        cached = self._chord_cache.get(cache_key)
+        if cached is not None:
+            return cached
+
         chords = []
         for chord in chord_progression:
             if chord.endswith('m'):
@@ -350,30 +450,28 @@ Return only the JSON object.
                     self.note_frequencies.get(self._shift_note(chord, 7), 392.00)
                 ]
             chords.append(chord_notes)
-        
+
+        self._chord_cache[cache_key] = chords
         return chords
-    
+
     def _shift_note(self, note: str, semitones: int) -> str:
         """Shift note by semitones"""
-        notes = list(self.note_frequencies.keys())
-        try:
-            current_index = notes.index(note)
-            new_index = (current_index + semitones) % 12
-            return notes[new_index]
-        except ValueError:
+        current_index = self._note_index.get(note)
+        if current_index is None:
             return note
+        return self._note_names[(current_index + semitones) % 12]
     
     def _mix_layers(self, layers: List[np.ndarray], volumes: List[float]) -> np.ndarray:
-        """Mix multiple audio layers"""
-        mixed = np.zeros_like(layers[0])
-        for layer, volume in zip(layers, volumes):
-            mixed += layer * volume
-        
+        """Mix multiple audio layers in a single weighted-sum pass"""
+        stacked = np.stack(layers)
+        mixed = np.einsum('ij,i->j', stacked,
+                          np.asarray(volumes, dtype=stacked.dtype))
+
         # Normalize
         max_val = np.max(np.abs(mixed))
         if max_val > 0:
-            mixed = mixed / max_val * 0.8
-        
+            mixed *= 0.8 / max_val
+
         return mixed
     
     def _apply_effects(self, audio: np.ndarray, params: Dict) -> np.ndarray:
@@ -390,17 +488,28 @@ Return only the JSON object.
         
         return audio
     
+    async def _save_music_async(self, music_data: np.ndarray, genre: str, mood: str) -> str:
+        """
+        Awaitable WAV save that runs the disk write on a worker thread
+
+        Keeps the event loop free while soundfile encodes and writes,
+        so async pipelines can start the next request meanwhile.
+        """
+        return await asyncio.to_thread(self._save_music, music_data, genre, mood)
+
     def _save_music(self, music_data: np.ndarray, genre: str, mood: str) -> str:
         """Save generated music to file"""
         try:
             os.makedirs('temp_audio', exist_ok=True)
             filename = f"temp_audio/music_{genre}_{mood}_{hash(str(music_data)) % 10000}.wav"
-            sf.write(filename, music_data, self.sample_rate)
+            sf.write(filename, np.clip(music_data, -1.0, 1.0).astype(np.float32),
+                     self.sample_rate, subtype='PCM_16')
             return filename
         except Exception as e:
             logger.error(f"Error saving music: {e}")
             filename = f"temp_audio/music_{genre}_{mood}_fallback.wav"
-            sf.write(filename, music_data, self.sample_rate)
+            sf.write(filename, np.clip(music_data, -1.0, 1.0).astype(np.float32),
+                     self.sample_rate, subtype='PCM_16')
             return filename
     
     def _generate_fallback_music(self, duration: int) -> str:
@@ -413,19 +522,20 @@ Return only the JSON object.
             
             filename = f"temp_audio/music_fallback_{hash(str(audio)) % 10000}.wav"
             os.makedirs('temp_audio', exist_ok=True)
-            sf.write(filename, audio, self.sample_rate)
+            sf.write(filename, np.clip(audio, -1.0, 1.0).astype(np.float32),
+                     self.sample_rate, subtype='PCM_16')
             return filename
         except Exception as e:
             logger.error(f"Error generating fallback music: {e}")
             return None
     
-    def get_available_genres(self) -> List[str]:
-        """Get list of available music genres"""
+    def get_available_genres(self) -> Tuple[str, ...]:
+        """Get the available music genres"""
         return self.available_genres
     
-    def get_genre_info(self, genre: str) -> Dict[str, Any]:
-        """Get detailed information about a specific genre"""
+    def get_genre_info(self, genre: str) -> Optional[Mapping[str, Any]]:
+        """Get a read-only view of a genre's parameters"""
         if genre in self.genre_params:
-            return self.genre_params[genre]
+            return types.MappingProxyType(self.genre_params[genre])
         else:
             return None
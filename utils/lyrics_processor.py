@@ -1,13 +1,54 @@
+import copy
 import re
 import logging
+import unicodedata
+from collections import Counter, defaultdict
+from functools import lru_cache
+
+import numpy as np
 from typing import List, Dict, Tuple
 
 logger = logging.getLogger(__name__)
 
+# Cleaning and TTS formatting patterns, compiled once at import instead
+# of per call; bracket and parenthesis removal share one alternation so
+# artifacts are stripped in a single pass
+_WS = re.compile(r'\s+')
+_BREAKS = re.compile(r'[;|]')
+_BRACKETS = re.compile(r'\[.*?\]|\(.*?\)')
+_PUNCT = re.compile(r'[^\w\s\n.,!?\'"-]')
+_DQUOTES = re.compile(r'["""]')
+_SQUOTES = re.compile(r"[''']")
+_SPACE_PUNCT = re.compile(r'\s+([.,!?])')
+_NEWLINES = re.compile(r'\n+')
+_SENTENCE_NL = re.compile(r'([.!?])\s*\n')
+_MULTI_DOT = re.compile(r'\.{3,}')
+_SUFFIX_RE = re.compile(r'(ing|ed|er|est|ly|es|s)$')
+
+# Theme keywords compiled into one alternation per theme, so detection
+# is a handful of linear scans instead of a substring search per keyword
+_THEME_PATTERNS = {
+    theme: re.compile('|'.join(re.escape(keyword) for keyword in keywords))
+    for theme, keywords in {
+        'love': ['love', 'heart', 'kiss', 'romance', 'passion', 'sweet'],
+        'heartbreak': ['break', 'pain', 'tears', 'lonely', 'hurt', 'sad'],
+        'freedom': ['free', 'fly', 'escape', 'break', 'wild', 'adventure'],
+        'party': ['dance', 'party', 'fun', 'good time', 'celebration'],
+        'reflection': ['think', 'remember', 'dream', 'hope', 'wish'],
+        'struggle': ['fight', 'battle', 'war', 'struggle', 'overcome'],
+        'nature': ['sun', 'moon', 'stars', 'ocean', 'mountain', 'wind']
+    }.items()
+}
+
 class LyricsProcessor:
     """Process and format lyrics for AI analysis and generation"""
     
     def __init__(self):
+        # Byte lookup table marking the vowels counted by the syllable
+        # estimator, so whole lyrics are scored in one vectorized pass
+        self._vowel_lut = np.zeros(256, dtype=np.uint8)
+        self._vowel_lut[[ord(ch) for ch in 'aeiouy']] = 1
+
         # Common song structure patterns
         self.song_sections = [
             'verse', 'chorus', 'bridge', 'intro', 'outro', 
@@ -31,17 +72,87 @@ class LyricsProcessor:
             'anapestic': 'Unstressed-unstressed-stressed',
             'dactylic': 'Stressed-unstressed-unstressed'
         }
-    
+
+        # Upper bound on accepted lyrics length (characters)
+        self.max_lyrics_length = 4096
+
+        # Compiled once; used for allocation-free word counting
+        self._word_pattern = re.compile(r'\S+')
+
+        # The pipeline is pure, so repeat lyrics (preview, TTS, voice
+        # cloning) are served from an LRU cache instead of re-analyzed
+        self._process_cached = lru_cache(maxsize=256)(self._process_lyrics_uncached)
+
+    def count_words(self, lyrics: str) -> int:
+        """
+        Count words without building a full split list
+
+        Args:
+            lyrics (str): Lyrics text
+
+        Returns:
+            int: Number of whitespace-separated words
+        """
+        return sum(1 for _ in self._word_pattern.finditer(lyrics))
+
+    def normalize(self, lyrics: str) -> str:
+        """
+        Normalize raw lyrics into a canonical form
+
+        Applies NFKC unicode normalization, collapses whitespace and
+        bounds the length, producing a cheap canonical form suitable as
+        a cache key and as input to the heavy pipeline stages.
+
+        Args:
+            lyrics (str): Raw lyrics text
+
+        Returns:
+            str: Normalized lyrics
+        """
+        if not lyrics:
+            return ''
+
+        normalized = unicodedata.normalize('NFKC', lyrics)
+        normalized = ' '.join(normalized.split())
+        return normalized[:self.max_lyrics_length]
+
+    def is_valid(self, lyrics: str) -> bool:
+        """
+        Cheap validity check for lyrics before heavy processing
+
+        Rejects empty, whitespace-only and letterless input so malformed
+        requests never reach model inference.
+
+        Args:
+            lyrics (str): Lyrics text (ideally already normalized)
+
+        Returns:
+            bool: True if the lyrics are worth processing
+        """
+        if not lyrics or not lyrics.strip():
+            return False
+
+        # Require at least one actual letter (rejects pure punctuation,
+        # digits and other junk)
+        return re.search(r'[a-zA-Z]', lyrics) is not None
+
     def process_lyrics(self, raw_lyrics: str) -> Dict:
         """
         Process raw lyrics and extract useful information
-        
+
+        Repeat inputs hit an LRU cache; the result is deep-copied on
+        return so callers can mutate it safely.
+
         Args:
             raw_lyrics (str): Raw lyrics text
-            
+
         Returns:
             Dict: Processed lyrics information
         """
+        return copy.deepcopy(self._process_cached(raw_lyrics))
+
+    def _process_lyrics_uncached(self, raw_lyrics: str) -> Dict:
+        """Run the full cleaning and analysis pipeline (uncached)"""
         try:
             # Clean lyrics
             cleaned_lyrics = self._clean_lyrics(raw_lyrics)
@@ -83,27 +194,26 @@ class LyricsProcessor:
     def _clean_lyrics(self, lyrics: str) -> str:
         """Clean and normalize lyrics text"""
         # Remove extra whitespace
-        cleaned = re.sub(r'\s+', ' ', lyrics.strip())
-        
+        cleaned = _WS.sub(' ', lyrics.strip())
+
         # Normalize line breaks
-        cleaned = re.sub(r'[;|]', '\n', cleaned)
-        
-        # Remove common artifacts
-        cleaned = re.sub(r'\[.*?\]', '', cleaned)  # Remove brackets
-        cleaned = re.sub(r'\(.*?\)', '', cleaned)  # Remove parentheses
-        
+        cleaned = _BREAKS.sub('\n', cleaned)
+
+        # Remove common artifacts (bracketed and parenthesized spans)
+        cleaned = _BRACKETS.sub('', cleaned)
+
         # Clean up punctuation
-        cleaned = re.sub(r'[^\w\s\n.,!?\'"-]', '', cleaned)
-        
+        cleaned = _PUNCT.sub('', cleaned)
+
         # Normalize quotes
-        cleaned = re.sub(r'["""]', '"', cleaned)
-        cleaned = re.sub(r"[''']", "'", cleaned)
-        
+        cleaned = _DQUOTES.sub('"', cleaned)
+        cleaned = _SQUOTES.sub("'", cleaned)
+
         # Fix spacing around punctuation
-        cleaned = re.sub(r'\s+([.,!?])', r'\1', cleaned)
-        
+        cleaned = _SPACE_PUNCT.sub(r'\1', cleaned)
+
         return cleaned
-    
+
     def _analyze_structure(self, lyrics: str) -> Dict:
         """Analyze the structure of the lyrics"""
         lines = lyrics.split('\n')
@@ -128,58 +238,41 @@ class LyricsProcessor:
     
     def _find_repetitions(self, lines: List[str]) -> List[Dict]:
         """Find repeated lines and patterns"""
-        repetitions = []
-        line_counts = {}
-        
-        for line in lines:
-            clean_line = line.strip().lower()
-            if clean_line:
-                if clean_line in line_counts:
-                    line_counts[clean_line] += 1
-                else:
-                    line_counts[clean_line] = 1
-        
+        counts = Counter(line.strip().lower() for line in lines if line.strip())
+
         # Find lines that repeat
-        for line, count in line_counts.items():
-            if count > 1:
-                repetitions.append({
-                    'line': line,
-                    'count': count,
-                    'type': 'chorus' if count >= 3 else 'verse'
-                })
-        
-        return repetitions
+        return [{
+            'line': line,
+            'count': count,
+            'type': 'chorus' if count >= 3 else 'verse'
+        } for line, count in counts.items() if count > 1]
     
     def _identify_sections(self, lines: List[str]) -> List[Dict]:
         """Identify different sections of the song"""
         sections = []
-        current_section = {
-            'type': 'verse',
-            'start_line': 0,
-            'end_line': 0,
-            'lines': []
-        }
-        
+        section_start = 0
+
+        def finalize(start, end):
+            # Materialize the section's lines once from the slice
+            # bounds instead of appending (and copying) line by line
+            sect_lines = [line for line in lines[start:end] if line.strip()]
+            if sect_lines:
+                sections.append({
+                    'type': self._guess_section_type(sect_lines),
+                    'start_line': start,
+                    'end_line': end - 1,
+                    'lines': sect_lines
+                })
+
         for i, line in enumerate(lines):
-            if line.strip():
-                current_section['lines'].append(line)
-                current_section['end_line'] = i
-            else:
+            if not line.strip():
                 # Empty line might indicate section break
-                if current_section['lines']:
-                    sections.append(current_section.copy())
-                    current_section = {
-                        'type': self._guess_section_type(current_section['lines']),
-                        'start_line': i + 1,
-                        'end_line': i + 1,
-                        'lines': []
-                    }
-        
+                finalize(section_start, i)
+                section_start = i + 1
+
         # Add final section
-        if current_section['lines']:
-            current_section['type'] = self._guess_section_type(current_section['lines'])
-            sections.append(current_section)
-        
+        finalize(section_start, len(lines))
+
         return sections
     
     def _guess_section_type(self, lines: List[str]) -> str:
@@ -236,27 +329,33 @@ class LyricsProcessor:
     
     def _estimate_syllables(self, words: List[str]) -> int:
         """Estimate syllable count for words"""
-        total_syllables = 0
-        
-        for word in words:
-            # Simple syllable estimation
-            word_lower = word.lower()
-            
-            # Count vowels (rough approximation)
-            vowels = len(re.findall(r'[aeiouy]', word_lower))
-            
-            # Adjust for common patterns
-            if word_lower.endswith('e'):
-                vowels -= 1  # Silent e
-            
-            if word_lower.endswith('le') and len(word_lower) > 2:
-                vowels += 1  # Consonant + le
-            
-            # Ensure at least 1 syllable
-            syllables = max(1, vowels)
-            total_syllables += syllables
-        
-        return total_syllables
+        if not words:
+            return 0
+
+        # One vectorized pass over the joined bytes: vowels become 1 via
+        # the lookup table and per-word counts are cumulative-sum
+        # differences at the space boundaries
+        joined = ' '.join(words).lower().encode('utf-8', 'ignore')
+        arr = np.frombuffer(joined, dtype=np.uint8)
+        if arr.size == 0:
+            return len(words)  # only empty words; one syllable each
+
+        vowel_sums = np.concatenate(([0], np.cumsum(self._vowel_lut[arr])))
+        bounds = np.concatenate(([-1], np.flatnonzero(arr == 32), [arr.size]))
+        starts = bounds[:-1] + 1
+        ends = bounds[1:]
+        vowels = (vowel_sums[ends] - vowel_sums[starts]).astype(np.int64)
+
+        # Adjust for common patterns
+        lengths = ends - starts
+        last = arr[np.where(lengths > 0, ends - 1, 0)]
+        second_last = arr[np.where(lengths > 1, ends - 2, 0)]
+        ends_e = (lengths > 0) & (last == ord('e'))
+        vowels -= ends_e  # Silent e
+        vowels += ends_e & (lengths > 2) & (second_last == ord('l'))  # Consonant + le
+
+        # Ensure at least 1 syllable per word
+        return int(np.maximum(1, vowels).sum())
     
     def _detect_rhyming(self, lyrics: str) -> Dict:
         """Detect rhyming patterns in the lyrics"""
@@ -265,26 +364,29 @@ class LyricsProcessor:
         if len(lines) < 2:
             return {'pattern': 'single_line', 'rhymes': []}
         
-        # Extract end words
-        end_words = []
-        for line in lines:
-            words = line.split()
-            if words:
-                end_words.append(words[-1].lower())
-        
-        # Find rhyming pairs
-        rhymes = []
-        for i in range(len(end_words) - 1):
-            if self._words_rhyme(end_words[i], end_words[i + 1]):
-                rhymes.append({
-                    'line1': i,
-                    'line2': i + 1,
-                    'word1': end_words[i],
-                    'word2': end_words[i + 1]
-                })
-        
+        # Extract end words and normalize each to a rhyme key once
+        # (suffix-stripped last two letters), so every comparison below
+        # is a plain equality check instead of a per-pair suffix loop
+        end_words = [line.split()[-1].lower() for line in lines]
+        keys = [self._rhyme_key(word) for word in end_words]
+
+        # Find adjacent rhyming pairs: the key and word comparisons run
+        # as vectorized string ops, so Python only touches the (few)
+        # indices that actually rhyme
+        keys_arr = np.asarray(keys)
+        words_arr = np.asarray(end_words)
+        mask = ((keys_arr[:-1] == keys_arr[1:])
+                & (keys_arr[:-1] != '')
+                & (words_arr[:-1] != words_arr[1:]))
+        rhymes = [{
+            'line1': i,
+            'line2': i + 1,
+            'word1': end_words[i],
+            'word2': end_words[i + 1]
+        } for i in map(int, np.flatnonzero(mask))]
+
         # Determine rhyme pattern
-        pattern = self._determine_rhyme_pattern(rhymes, len(lines))
+        pattern = self._determine_rhyme_pattern(rhymes, len(lines), keys)
         
         return {
             'pattern': pattern,
@@ -292,34 +394,38 @@ class LyricsProcessor:
             'total_rhymes': len(rhymes)
         }
     
+    def _rhyme_key(self, word: str) -> str:
+        """Normalize a word to its rhyme key (suffix-stripped ending)"""
+        stem = _SUFFIX_RE.sub('', word)
+        return stem[-2:] if len(stem) >= 2 else ''
+
     def _words_rhyme(self, word1: str, word2: str) -> bool:
         """Check if two words rhyme"""
         # Simple rhyming check based on ending sounds
         if word1 == word2:
             return False
-        
-        # Remove common suffixes
-        suffixes = ['ing', 'ed', 'er', 'est', 'ly', 's', 'es']
-        clean1 = word1
-        clean2 = word2
-        
-        for suffix in suffixes:
-            if clean1.endswith(suffix):
-                clean1 = clean1[:-len(suffix)]
-            if clean2.endswith(suffix):
-                clean2 = clean2[:-len(suffix)]
-        
-        # Check if they end with similar sounds
-        if len(clean1) >= 2 and len(clean2) >= 2:
-            return clean1[-2:] == clean2[-2:]
-        
-        return False
-    
-    def _determine_rhyme_pattern(self, rhymes: List[Dict], total_lines: int) -> str:
+
+        key1 = self._rhyme_key(word1)
+        return bool(key1) and key1 == self._rhyme_key(word2)
+
+    def _determine_rhyme_pattern(self, rhymes: List[Dict], total_lines: int,
+                                 keys: List[str]) -> str:
         """Determine the overall rhyme pattern"""
         if not rhymes:
+            # The adjacent scan misses alternating schemes; bucketing
+            # the leading rhyme keys exposes them without re-comparing
+            # any words
+            by_key = defaultdict(list)
+            for i, key in enumerate(keys[:4]):
+                if key:
+                    by_key[key].append(i)
+            groups = sorted(lines for lines in by_key.values() if len(lines) > 1)
+            if groups == [[0, 2], [1, 3]]:
+                return 'abab'
+            if groups == [[0, 3], [1, 2]]:
+                return 'abba'
             return 'free'
-        
+
         # Simple pattern detection
         if len(rhymes) >= total_lines // 2:
             # Check for common patterns
@@ -334,40 +440,23 @@ class LyricsProcessor:
     
     def _identify_themes(self, lyrics: str) -> List[str]:
         """Identify common themes in the lyrics"""
-        themes = []
-        
-        # Common theme keywords
-        theme_keywords = {
-            'love': ['love', 'heart', 'kiss', 'romance', 'passion', 'sweet'],
-            'heartbreak': ['break', 'pain', 'tears', 'lonely', 'hurt', 'sad'],
-            'freedom': ['free', 'fly', 'escape', 'break', 'wild', 'adventure'],
-            'party': ['dance', 'party', 'fun', 'good time', 'celebration'],
-            'reflection': ['think', 'remember', 'dream', 'hope', 'wish'],
-            'struggle': ['fight', 'battle', 'war', 'struggle', 'overcome'],
-            'nature': ['sun', 'moon', 'stars', 'ocean', 'mountain', 'wind']
-        }
-        
         lyrics_lower = lyrics.lower()
-        
-        for theme, keywords in theme_keywords.items():
-            if any(keyword in lyrics_lower for keyword in keywords):
-                themes.append(theme)
-        
-        return themes
+        return [theme for theme, pattern in _THEME_PATTERNS.items()
+                if pattern.search(lyrics_lower)]
     
     def format_for_tts(self, lyrics: str) -> str:
         """Format lyrics for better text-to-speech quality"""
         # Add pauses between lines
-        formatted = re.sub(r'\n+', '\n...\n', lyrics)
-        
+        formatted = _NEWLINES.sub('\n...\n', lyrics)
+
         # Add pauses between sections
-        formatted = re.sub(r'([.!?])\s*\n', r'\1\n...\n', formatted)
-        
+        formatted = _SENTENCE_NL.sub(r'\1\n...\n', formatted)
+
         # Clean up multiple pauses
-        formatted = re.sub(r'\.{3,}', '...', formatted)
-        
+        formatted = _MULTI_DOT.sub('...', formatted)
+
         return formatted
-    
+
     def get_lyrics_summary(self, processed_lyrics: Dict) -> str:
         """Generate a summary of the processed lyrics"""
         if 'error' in processed_lyrics:
@@ -1,6 +1,7 @@
 import re
+import hashlib
 import logging
-from textblob import TextBlob
+from collections import OrderedDict
 from transformers import pipeline
 import nltk
 from nltk.sentiment import SentimentIntensityAnalyzer
@@ -13,22 +14,64 @@ except:
 
 logger = logging.getLogger(__name__)
 
+_WORD_RE = re.compile(r"\w+")
+
+# Lyrics cleaning: punctuation becomes spaces. ASCII input goes through
+# a C-level str.translate table; the precompiled regex only runs for
+# non-ASCII text, where \w needs unicode semantics.
+_CLEAN_RE = re.compile(r'[^\w\s]')
+_CLEAN_TABLE = str.maketrans({c: ' ' for c in map(chr, range(128))
+                              if _CLEAN_RE.match(c)})
+
+# Transformer emotion label -> mood category, built once rather than as
+# a dict literal on every _combine_analyses call
+_EMOTION_MOOD_MAP = {
+    'joy': 'happy',
+    'love': 'romantic',
+    'anger': 'angry',
+    'sadness': 'sad',
+    'fear': 'mysterious',
+    'surprise': 'energetic',
+    'disgust': 'angry'
+}
+
 class MoodAnalyzer:
     """AI-powered mood analyzer for lyrics"""
-    
+
+    # Entries kept per memo cache before the oldest is evicted
+    _CACHE_MAX = 512
+
+    # Transformer pipeline shared by every instance; constructing it
+    # per-instance reloads the model weights each time
+    _PIPELINE = None
+    _PIPELINE_FAILED = False
+
+    @classmethod
+    def _get_pipeline(cls):
+        """Build the emotion pipeline once and reuse it across instances"""
+        if cls._PIPELINE is None and not cls._PIPELINE_FAILED:
+            try:
+                cls._PIPELINE = pipeline(
+                    "text-classification",
+                    model="j-hartmann/emotion-english-distilroberta-base",
+                    top_k=None
+                )
+            except Exception as e:
+                logger.warning(f"Could not load emotion classifier: {e}")
+                cls._PIPELINE_FAILED = True
+        return cls._PIPELINE
+
     def __init__(self):
         self.sentiment_analyzer = SentimentIntensityAnalyzer()
+
+        # Cleaned-lyrics digest -> classifier / sentiment results.
+        # Iterative generation reanalyzes the same lyric repeatedly, so
+        # repeats short-circuit the transformer and VADER entirely.
+        self._emotion_cache = OrderedDict()
+        self._sentiment_cache = OrderedDict()
         
-        # Initialize emotion classification pipeline
-        try:
-            self.emotion_classifier = pipeline(
-                "text-classification",
-                model="j-hartmann/emotion-english-distilroberta-base",
-                top_k=None
-            )
-        except Exception as e:
-            logger.warning(f"Could not load emotion classifier: {e}")
-            self.emotion_classifier = None
+        # Initialize emotion classification pipeline (shared singleton)
+        self.emotion_classifier = self._get_pipeline()
         
         # Mood to genre mapping
         self.mood_genre_map = {
@@ -57,6 +100,19 @@ class MoodAnalyzer:
             'dramatic': ['epic', 'hero', 'battle', 'victory', 'defeat', 'destiny', 'fate'],
             'mysterious': ['secret', 'mystery', 'unknown', 'shadow', 'whisper', 'hidden']
         }
+
+        # Keyword table split for one-pass scoring: single words score
+        # via set intersection against the tokenized lyrics (whole-word
+        # matches, so 'hope' no longer fires on 'hopeless'), the rare
+        # multi-word phrases fall back to a substring check
+        self._keyword_sets = {
+            mood: frozenset(kw for kw in kws if ' ' not in kw)
+            for mood, kws in self.emotion_keywords.items()
+        }
+        self._keyword_phrases = {
+            mood: [kw for kw in kws if ' ' in kw]
+            for mood, kws in self.emotion_keywords.items()
+        }
     
     def analyze(self, lyrics):
         """
@@ -68,129 +124,213 @@ class MoodAnalyzer:
         Returns:
             dict: Analysis results with mood, confidence, emotions, and suggested genre
         """
-        try:
-            # Clean lyrics
-            cleaned_lyrics = self._clean_lyrics(lyrics)
-            
-            # Basic sentiment analysis
-            sentiment_scores = self._analyze_sentiment(cleaned_lyrics)
-            
-            # Emotion classification
-            emotions = self._classify_emotions(cleaned_lyrics)
-            
-            # Keyword-based mood detection
-            keyword_mood = self._detect_mood_by_keywords(cleaned_lyrics)
-            
-            # Combine all analyses
-            final_mood = self._combine_analyses(sentiment_scores, emotions, keyword_mood)
-            
-            # Determine confidence
-            confidence = self._calculate_confidence(sentiment_scores, emotions, keyword_mood)
-            
-            # Suggest genre based on mood
-            suggested_genre = self.mood_genre_map.get(final_mood, 'pop')
-            
-            return {
-                'mood': final_mood,
-                'confidence': confidence,
+        return self.analyze_batch([lyrics])[0]
+
+    def analyze_batch(self, lyrics_list):
+        """
+        Analyze several lyrics in one emotion-classifier forward pass
+
+        Batching amortizes the transformer's fixed per-call overhead, so
+        concurrent requests coalesced into one batch run much faster
+        than sequential single-item calls.
+
+        Args:
+            lyrics_list (list): Lyrics strings to analyze
+
+        Returns:
+            list: One analysis result dict per input
+        """
+        cleaned_list = [self._clean_lyrics(lyrics) for lyrics in lyrics_list]
+
+        # One batched transformer call, but only for inputs long enough
+        # to be worth a forward pass; near-empty lyrics would get noise
+        # back from the model, so they skip it and rely on VADER and
+        # keyword scoring alone
+        needs_model = [i for i, cleaned in enumerate(cleaned_list)
+                       if len(cleaned.split()) >= 4]
+        emotions_list = [[] for _ in cleaned_list]
+        if needs_model:
+            classified = self._classify_emotions_batch(
+                [cleaned_list[i] for i in needs_model])
+            for i, emotions in zip(needs_model, classified):
+                emotions_list[i] = emotions
+
+        results = []
+        for cleaned_lyrics, emotions in zip(cleaned_list, emotions_list):
+            try:
+                results.append(self._analyze_cleaned(cleaned_lyrics, emotions))
+            except Exception as e:
+                logger.error(f"Error analyzing mood: {e}")
+                results.append({
+                    'mood': 'neutral',
+                    'confidence': 0.0,
+                    'emotions': [],
+                    'suggested_genre': 'pop'
+                })
+
+        return results
+
+    def _analyze_cleaned(self, cleaned_lyrics, emotions):
+        """Build the analysis result for cleaned lyrics with precomputed emotions"""
+        # Basic sentiment analysis
+        sentiment_scores = self._analyze_sentiment(cleaned_lyrics)
+
+        # Keyword-based mood detection
+        keyword_mood = self._detect_mood_by_keywords(cleaned_lyrics)
+
+        # Combine all analyses
+        final_mood = self._combine_analyses(sentiment_scores, emotions, keyword_mood)
+
+        # Determine confidence
+        confidence = self._calculate_confidence(sentiment_scores, emotions, keyword_mood)
+
+        # Suggest genre based on mood
+        suggested_genre = self.mood_genre_map.get(final_mood, 'pop')
+
+        return {
+            'mood': final_mood,
+            'confidence': confidence,
+            'emotions': emotions,
+            'sentiment_scores': sentiment_scores,
+            'suggested_genre': suggested_genre,
+            'analysis_methods': {
+                'sentiment': sentiment_scores,
                 'emotions': emotions,
-                'sentiment_scores': sentiment_scores,
-                'suggested_genre': suggested_genre,
-                'analysis_methods': {
-                    'sentiment': sentiment_scores,
-                    'emotions': emotions,
-                    'keywords': keyword_mood
-                }
+                'keywords': keyword_mood
             }
-            
-        except Exception as e:
-            logger.error(f"Error analyzing mood: {e}")
-            return {
-                'mood': 'neutral',
-                'confidence': 0.0,
-                'emotions': [],
-                'suggested_genre': 'pop'
-            }
-    
+        }
+
+
     def _clean_lyrics(self, lyrics):
         """Clean and preprocess lyrics"""
         # Remove special characters but keep spaces
-        cleaned = re.sub(r'[^\w\s]', ' ', lyrics)
-        # Convert to lowercase
-        cleaned = cleaned.lower()
-        # Remove extra whitespace
-        cleaned = ' '.join(cleaned.split())
-        return cleaned
+        if lyrics.isascii():
+            cleaned = lyrics.translate(_CLEAN_TABLE)
+        else:
+            cleaned = _CLEAN_RE.sub(' ', lyrics)
+        # Lowercase and collapse whitespace
+        return ' '.join(cleaned.lower().split())
     
+    @staticmethod
+    def _cache_key(lyrics):
+        return hashlib.blake2b(lyrics.encode('utf-8'), digest_size=16).digest()
+
+    def _cache_lookup(self, cache, key):
+        value = cache.get(key)
+        if value is not None:
+            cache.move_to_end(key)
+        return value
+
+    def _cache_store(self, cache, key, value):
+        cache[key] = value
+        if len(cache) > self._CACHE_MAX:
+            cache.popitem(last=False)
+
     def _analyze_sentiment(self, lyrics):
-        """Analyze sentiment using TextBlob and NLTK"""
-        # TextBlob sentiment
-        blob = TextBlob(lyrics)
-        textblob_polarity = blob.sentiment.polarity
-        textblob_subjectivity = blob.sentiment.subjectivity
-        
-        # NLTK VADER sentiment
+        """Analyze sentiment using NLTK VADER"""
+        key = self._cache_key(lyrics)
+        cached = self._cache_lookup(self._sentiment_cache, key)
+        if cached is not None:
+            return cached
+
+        # NLTK VADER sentiment; TextBlob used to run here too, but only
+        # the VADER scores are ever consumed downstream
         vader_scores = self.sentiment_analyzer.polarity_scores(lyrics)
-        
-        return {
-            'textblob_polarity': textblob_polarity,
-            'textblob_subjectivity': textblob_subjectivity,
+
+        result = {
             'vader_compound': vader_scores['compound'],
             'vader_positive': vader_scores['pos'],
             'vader_negative': vader_scores['neg'],
             'vader_neutral': vader_scores['neu']
         }
+        self._cache_store(self._sentiment_cache, key, result)
+        return result
     
     def _classify_emotions(self, lyrics):
         """Classify emotions using transformer model"""
+        return self._classify_emotions_batch([lyrics])[0]
+
+    def _classify_emotions_batch(self, lyrics_list):
+        """Classify emotions for several lyrics in one model forward pass"""
         if not self.emotion_classifier:
-            return []
-        
+            return [[] for _ in lyrics_list]
+
+        # Serve repeats from the memo cache; only misses reach the model
+        keys = [self._cache_key(lyrics) for lyrics in lyrics_list]
+        results = [self._cache_lookup(self._emotion_cache, key) for key in keys]
+        miss_indices = [i for i, result in enumerate(results) if result is None]
+        if not miss_indices:
+            return results
+
+        computed = self._classify_emotions_uncached(
+            [lyrics_list[i] for i in miss_indices])
+        for i, emotions in zip(miss_indices, computed):
+            results[i] = emotions
+            self._cache_store(self._emotion_cache, keys[i], emotions)
+        return results
+
+    def _classify_emotions_uncached(self, lyrics_list):
+        """Run the transformer over lyrics not found in the cache"""
         try:
-            # Split lyrics into chunks if too long
-            words = lyrics.split()
-            if len(words) > 512:  # Model limit
-                chunks = [' '.join(words[i:i+512]) for i in range(0, len(words), 512)]
-            else:
-                chunks = [lyrics]
-            
-            all_emotions = []
-            for chunk in chunks:
-                results = self.emotion_classifier(chunk)
-                if results and len(results) > 0:
-                    chunk_emotions = results[0]
-                    all_emotions.extend(chunk_emotions)
-            
-            # Aggregate emotions across chunks
-            emotion_scores = {}
-            for emotion in all_emotions:
-                label = emotion['label']
-                score = emotion['score']
-                if label in emotion_scores:
-                    emotion_scores[label] = max(emotion_scores[label], score)
+            # Split long lyrics into chunks, tracking which input each
+            # chunk belongs to so everything runs in a single batch
+            chunks = []
+            owners = []
+            for index, lyrics in enumerate(lyrics_list):
+                words = lyrics.split()
+                if len(words) > 512:  # Model limit
+                    for i in range(0, len(words), 512):
+                        chunks.append(' '.join(words[i:i+512]))
+                        owners.append(index)
                 else:
-                    emotion_scores[label] = score
-            
-            # Return top emotions
-            sorted_emotions = sorted(emotion_scores.items(), key=lambda x: x[1], reverse=True)
-            return [{'emotion': emotion, 'score': score} for emotion, score in sorted_emotions[:5]]
-            
+                    chunks.append(lyrics)
+                    owners.append(index)
+
+            # Without an explicit batch_size the pipeline still runs
+            # one forward pass per chunk; batching them pads once and
+            # launches a single pass, with truncation guarding any
+            # chunk that tokenizes past the model limit
+            batch_results = self.emotion_classifier(
+                chunks, batch_size=len(chunks), truncation=True)
+
+            # Aggregate emotions per input across its chunks
+            emotion_scores_list = [{} for _ in lyrics_list]
+            for owner, chunk_emotions in zip(owners, batch_results):
+                emotion_scores = emotion_scores_list[owner]
+                for emotion in chunk_emotions:
+                    label = emotion['label']
+                    score = emotion['score']
+                    if label in emotion_scores:
+                        emotion_scores[label] = max(emotion_scores[label], score)
+                    else:
+                        emotion_scores[label] = score
+
+            # Return top emotions per input
+            results = []
+            for emotion_scores in emotion_scores_list:
+                sorted_emotions = sorted(emotion_scores.items(), key=lambda x: x[1], reverse=True)
+                results.append([{'emotion': emotion, 'score': score}
+                                for emotion, score in sorted_emotions[:5]])
+            return results
+
         except Exception as e:
             logger.warning(f"Error in emotion classification: {e}")
-            return []
+            return [[] for _ in lyrics_list]
     
     def _detect_mood_by_keywords(self, lyrics):
         """Detect mood based on keyword presence"""
+        # Tokenize once; each mood is then a set intersection instead
+        # of a substring scan per keyword
+        token_set = frozenset(_WORD_RE.findall(lyrics))
+
         mood_scores = {}
-        
         for mood, keywords in self.emotion_keywords.items():
-            score = 0
-            for keyword in keywords:
-                if keyword in lyrics:
-                    score += 1
+            score = len(self._keyword_sets[mood] & token_set)
+            score += sum(1 for phrase in self._keyword_phrases[mood]
+                         if phrase in lyrics)
             if score > 0:
                 mood_scores[mood] = score / len(keywords)
-        
+
         return mood_scores
     
     def _combine_analyses(self, sentiment_scores, emotions, keyword_mood):
@@ -215,16 +355,7 @@ class MoodAnalyzer:
         if emotions:
             top_emotion = emotions[0]
             if top_emotion['score'] > 0.7:  # High confidence
-                emotion_mood_map = {
-                    'joy': 'happy',
-                    'love': 'romantic',
-                    'anger': 'angry',
-                    'sadness': 'sad',
-                    'fear': 'mysterious',
-                    'surprise': 'energetic',
-                    'disgust': 'angry'
-                }
-                return emotion_mood_map.get(top_emotion['emotion'], base_mood)
+                return _EMOTION_MOOD_MAP.get(top_emotion['emotion'], base_mood)
         
         return base_mood
     
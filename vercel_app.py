@@ -3,6 +3,7 @@ from flask_cors import CORS
 import os
 import json
 import tempfile
+from concurrent.futures import ThreadPoolExecutor
 from werkzeug.utils import secure_filename
 import logging
 
@@ -20,12 +21,44 @@ CORS(app)
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-# Initialize AI components
-mood_analyzer = GeminiMoodAnalyzer()
-music_generator = GeminiMusicGenerator()
-voice_cloner = GeminiVoiceCloner()
-audio_mixer = AudioMixer()
-lyrics_processor = LyricsProcessor()
+# AI components are initialized lazily so importing this module (e.g.
+# alongside app.py, or from the serverless entry point) never loads two
+# full sets of models into one process
+_mood_analyzer = None
+_music_generator = None
+_voice_cloner = None
+_audio_mixer = None
+_lyrics_processor = None
+
+def get_mood_analyzer():
+    global _mood_analyzer
+    if _mood_analyzer is None:
+        _mood_analyzer = GeminiMoodAnalyzer()
+    return _mood_analyzer
+
+def get_music_generator():
+    global _music_generator
+    if _music_generator is None:
+        _music_generator = GeminiMusicGenerator()
+    return _music_generator
+
+def get_voice_cloner():
+    global _voice_cloner
+    if _voice_cloner is None:
+        _voice_cloner = GeminiVoiceCloner()
+    return _voice_cloner
+
+def get_audio_mixer():
+    global _audio_mixer
+    if _audio_mixer is None:
+        _audio_mixer = AudioMixer()
+    return _audio_mixer
+
+def get_lyrics_processor():
+    global _lyrics_processor
+    if _lyrics_processor is None:
+        _lyrics_processor = LyricsProcessor()
+    return _lyrics_processor
 
 @app.route('/', methods=['GET'])
 def home():
@@ -113,7 +146,7 @@ def analyze_mood():
             return jsonify({'error': 'Lyrics are required'}), 400
         
         # Analyze mood using Gemini AI
-        mood_result = mood_analyzer.analyze(lyrics)
+        mood_result = get_mood_analyzer().analyze(lyrics)
         
         return jsonify({
             'mood': mood_result['mood'],
@@ -139,7 +172,7 @@ def generate_music():
         duration = data.get('duration', 30)
         
         # Generate music using Gemini AI
-        music_path = music_generator.generate(mood, genre, duration)
+        music_path = get_music_generator().generate(mood, genre, duration)
         
         return jsonify({
             'music_path': music_path,
@@ -165,7 +198,7 @@ def clone_voice():
             return jsonify({'error': 'Lyrics are required'}), 400
         
         # Clone voice using Gemini AI
-        voice_path = voice_cloner.clone_voice(lyrics, artist_voice)
+        voice_path = get_voice_cloner().clone_voice(lyrics, artist_voice)
         
         return jsonify({
             'voice_path': voice_path,
@@ -191,23 +224,29 @@ def create_song():
             return jsonify({'error': 'Lyrics are required'}), 400
         
         # Step 1: Analyze mood with Gemini AI
-        mood_result = mood_analyzer.analyze(lyrics)
+        mood_result = get_mood_analyzer().analyze(lyrics)
         
-        # Step 2: Generate background music with Gemini AI
+        # Steps 2 and 3: music generation and voice cloning only share
+        # the mood result, so they run concurrently; numpy releases the
+        # GIL in the heavy ufuncs, letting the two overlap on cores
         if genre == 'auto':
             genre = mood_result['suggested_genre']
-        
-        music_path = music_generator.generate(
-            mood_result['mood'], 
-            genre, 
-            len(lyrics.split()) * 2
-        )
-        
-        # Step 3: Clone voice with Gemini AI
-        voice_path = voice_cloner.clone_voice(lyrics, artist_voice)
+
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            music_future = executor.submit(
+                get_music_generator().generate,
+                mood_result['mood'],
+                genre,
+                len(lyrics.split()) * 2
+            )
+            voice_future = executor.submit(
+                get_voice_cloner().clone_voice, lyrics, artist_voice
+            )
+            music_path = music_future.result()
+            voice_path = voice_future.result()
         
         # Step 4: Mix audio
-        song_path = audio_mixer.mix_audio(voice_path, music_path, genre)
+        song_path = get_audio_mixer().mix_audio(voice_path, music_path, genre)
         
         # Step 5: Clean up temporary files
         try:
@@ -252,7 +291,7 @@ def download_song(filename):
 def get_available_voices():
     """Get list of available artist voices"""
     try:
-        voices = voice_cloner.get_available_voices()
+        voices = get_voice_cloner().get_available_voices()
         return jsonify({'voices': voices})
     
     except Exception as e:
@@ -263,7 +302,7 @@ def get_available_voices():
 def get_available_genres():
     """Get list of available music genres"""
     try:
-        genres = music_generator.get_available_genres()
+        genres = get_music_generator().get_available_genres()
         return jsonify({'genres': genres})
     
     except Exception as e:
@@ -278,14 +317,20 @@ def not_found(error):
 def internal_error(error):
     return jsonify({'error': 'Internal server error'}), 500
 
+# Create output directories at import time so the serverless handler
+# (which never runs the __main__ block) also gets them. On Vercel the
+# filesystem is read-only outside /tmp, so a failure here must not
+# take down the import - the save paths surface their own errors
+for _output_dir in ('generated_songs', 'temp_audio'):
+    try:
+        os.makedirs(_output_dir, exist_ok=True)
+    except OSError as e:
+        logger.warning(f"Could not create {_output_dir} at import: {e}")
+
 # Vercel serverless function handler
 def handler(request):
     return app(request.environ, lambda *args: None)
 
 if __name__ == '__main__':
-    # Create necessary directories
-    os.makedirs('generated_songs', exist_ok=True)
-    os.makedirs('temp_audio', exist_ok=True)
-    
     logger.info("Starting Nusify AI Music Generator - Gemini Edition...")
     app.run(debug=True, host='0.0.0.0', port=5000)